@@ -36,13 +36,8 @@ from .lexical import (
     analyze_file
 )
 
-# 导入工具模块
+# 导入工具模块（可视化工具按需导入，见 __getattr__）
 from .utils import (
-    visualize_nfa,
-    visualize_dfa,
-    render_transition_table,
-    create_token_table_html,
-    create_statistics_chart,
     read_file_safe,
     write_file_safe,
     detect_language,
@@ -97,4 +92,22 @@ __all__ = [
     'analyze_tokens',
     'get_supported_languages',
     'get_compiler_info'
-]
\ No newline at end of file
+]
+
+
+# 可视化工具依赖较重的第三方库，仅在首次访问时导入
+_UTIL_LAZY = {
+    'visualize_nfa',
+    'visualize_dfa',
+    'render_transition_table',
+    'create_token_table_html',
+    'create_statistics_chart'
+}
+
+
+def __getattr__(name):
+    """按需导入工具模块中的可视化函数 (PEP 562)"""
+    if name in _UTIL_LAZY:
+        from . import utils
+        return getattr(utils, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
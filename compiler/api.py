@@ -16,13 +16,36 @@
 
 import os
 import time
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional, Union, Tuple
-from pathlib import Path
+
+# JSON序列化：优先使用orjson（可选依赖），否则使用标准库json
+try:
+    import orjson
+    
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+except ImportError:
+    import json
+    
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
 
 # 导入各个模块
 from .lexical import LexicalAnalyzer, Token, create_c_analyzer, create_pascal_analyzer
 from .utils import read_file_safe, write_file_safe, detect_language, get_language_info
-from .utils import format_token_table, format_statistics, format_errors, create_html_report
+
+
+# 词法分析器缓存：(语言, 规则文件) -> (规则文件修改时间, 已构建规则的模板分析器)
+# 构建分析器需要编译全部词法规则，重复编译时直接复用；规则文件改动后原位替换旧条目
+_ANALYZER_CACHE: Dict[tuple, Tuple[Optional[float], LexicalAnalyzer]] = {}
+
+# 便利函数使用的编译器缓存：(语言, 固定配置, 用户配置) -> Compiler，只保留最近使用的几份配置
+_COMPILER_CACHE: 'OrderedDict[tuple, Compiler]' = OrderedDict()
+_COMPILER_CACHE_SIZE = 8
+
+# 支持的语言
+_SUPPORTED_LANGS = frozenset(('c', 'pascal'))
 
 
 class CompilerConfig:
@@ -32,6 +55,18 @@ class CompilerConfig:
     管理编译器的各种配置选项
     """
     
+    # 固定的配置项列表，实例不再携带 __dict__
+    __slots__ = (
+        'language', 'target', 'optimization_level',
+        'enable_lexical', 'enable_syntax', 'enable_semantic', 'enable_codegen',
+        'verbose', 'debug', 'output_tokens', 'skip_statistics',
+        'output_ast', 'output_ir', 'output_assembly',
+        'input_encoding', 'output_encoding', 'backup_files',
+        'stop_on_error', 'max_errors',
+        'lexical_rules_file', 'custom_tokens'
+    )
+    _FIELDS = frozenset(__slots__)
+    
     def __init__(self):
         # 基本配置
         self.language = 'c'  # 目标语言
@@ -48,6 +83,7 @@ class CompilerConfig:
         self.verbose = False
         self.debug = False
         self.output_tokens = True
+        self.skip_statistics = False  # 跳过统计信息（仅需Token时使用）
         self.output_ast = False
         self.output_ir = False
         self.output_assembly = False
@@ -72,8 +108,9 @@ class CompilerConfig:
         Args:
             config_dict: 配置字典
         """
+        fields = self._FIELDS
         for key, value in config_dict.items():
-            if hasattr(self, key):
+            if key in fields:
                 setattr(self, key, value)
     
     def to_dict(self) -> Dict[str, Any]:
@@ -83,8 +120,7 @@ class CompilerConfig:
         Returns:
             配置字典
         """
-        return {key: value for key, value in self.__dict__.items() 
-                if not key.startswith('_')}
+        return {key: getattr(self, key) for key in self.__slots__}
     
     def validate(self) -> List[str]:
         """
@@ -96,7 +132,7 @@ class CompilerConfig:
         errors = []
         
         # 验证语言
-        if self.language not in ['c', 'pascal']:
+        if self.language not in _SUPPORTED_LANGS:
             errors.append(f"不支持的语言: {self.language}")
         
         # 验证优化级别
@@ -197,6 +233,22 @@ class CompilationResult:
         """
         status = "成功" if self.success else "失败"
         return f"编译{status} - {len(self.errors)}个错误, {len(self.warnings)}个警告"
+    
+    def to_json(self) -> str:
+        """
+        序列化为JSON字符串（不包含Token列表本身）
+        
+        Returns:
+            JSON字符串
+        """
+        return _dumps({
+            'success': self.success,
+            'errors': self.errors,
+            'warnings': self.warnings,
+            'statistics': self.statistics,
+            'tokens_count': len(self.tokens),
+            'processing_time': self.processing_time
+        })
 
 
 class Compiler:
@@ -214,7 +266,7 @@ class Compiler:
             config: 编译器配置
         """
         self.config = config or CompilerConfig()
-        self.lexical_analyzer = None
+        self.lexical_analyzer = None  # 最近一次使用的词法分析器
         
         # 验证配置
         config_errors = self.config.validate()
@@ -232,6 +284,7 @@ class Compiler:
         Returns:
             编译结果
         """
+        cfg = self.config
         result = CompilationResult()
         result.source_file = source_file
         
@@ -239,17 +292,17 @@ class Compiler:
         
         try:
             # 读取源文件
-            source_code, error = read_file_safe(source_file, self.config.input_encoding)
+            source_code, error = read_file_safe(source_file, cfg.input_encoding)
             if error:
                 result.add_error(f"读取文件失败: {error}", stage="file_io")
                 return result
             
             # 检测语言
-            if not self.config.language:
+            if not cfg.language:
                 detected_language = detect_language(source_file, source_code)
-                self.config.language = detected_language
+                cfg.language = detected_language
             
-            result.language = self.config.language
+            result.language = cfg.language
             
             # 编译源代码
             return self.compile_source(source_code, source_file, output_file)
@@ -274,40 +327,44 @@ class Compiler:
         Returns:
             编译结果
         """
+        # 配置项在整个编译过程中只读取一次
+        cfg = self.config
+        stop_on_error = cfg.stop_on_error
+        
         result = CompilationResult()
         result.source_file = source_file
-        result.language = self.config.language
+        result.language = cfg.language
         
         start_time = time.time()
         
         try:
             # 词法分析
-            if self.config.enable_lexical:
+            if cfg.enable_lexical:
                 success = self._perform_lexical_analysis(source_code, result)
-                if not success and self.config.stop_on_error:
+                if not success and stop_on_error:
                     return result
             
             # 语法分析（暂未实现）
-            if self.config.enable_syntax:
+            if cfg.enable_syntax:
                 success = self._perform_syntax_analysis(result)
-                if not success and self.config.stop_on_error:
+                if not success and stop_on_error:
                     return result
             
             # 语义分析（暂未实现）
-            if self.config.enable_semantic:
+            if cfg.enable_semantic:
                 success = self._perform_semantic_analysis(result)
-                if not success and self.config.stop_on_error:
+                if not success and stop_on_error:
                     return result
             
             # 代码生成（暂未实现）
-            if self.config.enable_codegen:
+            if cfg.enable_codegen:
                 success = self._perform_code_generation(result)
-                if not success and self.config.stop_on_error:
+                if not success and stop_on_error:
                     return result
             
             # 生成输出文件
             if output_file:
-                self._generate_output_files(result, output_file)
+                self._generate_output_files(result, output_file, source_code)
             
             result.success = not result.has_errors()
             
@@ -323,6 +380,9 @@ class Compiler:
         """
         执行词法分析
         
+        result.tokens 直接引用词法分析器返回的列表，不做复制；
+        analyze 每次调用都会创建新列表，因此该引用不会被后续分析修改。
+        
         Args:
             source_code: 源代码
             result: 编译结果
@@ -330,49 +390,51 @@ class Compiler:
         Returns:
             是否成功
         """
+        cfg = self.config
+        
         try:
-            # 创建词法分析器
-            if self.config.language == 'c':
-                self.lexical_analyzer = create_c_analyzer()
-            elif self.config.language == 'pascal':
-                self.lexical_analyzer = create_pascal_analyzer()
-            else:
-                result.add_error(f"不支持的语言: {self.config.language}", stage="lexical")
+            # 获取词法分析器（相同配置复用已构建的规则）
+            # 使用局部变量，避免同一编译器上的多次调用互相干扰
+            analyzer, error = _get_analyzer(cfg.language, cfg.lexical_rules_file)
+            if error:
+                result.add_error(error, stage="lexical")
                 return False
-            
-            # 加载自定义规则
-            if self.config.lexical_rules_file:
-                error = self.lexical_analyzer.load_rules_from_file(self.config.lexical_rules_file)
-                if error:
-                    result.add_error(f"加载词法规则失败: {error}", stage="lexical")
-                    return False
+            self.lexical_analyzer = analyzer
             
             # 执行词法分析
-            tokens = self.lexical_analyzer.analyze(source_code)
-            errors = self.lexical_analyzer.get_errors()
+            tokens = analyzer.analyze(source_code)
+            errors = analyzer.get_errors()
             
-            result.tokens = tokens
+            result.tokens = tokens  # 不复制，见文档说明
             
-            # 处理错误
-            for error in errors:
-                if isinstance(error, str):
-                    result.add_error(error, stage='lexical')
-                else:
-                    result.add_error(
-                        error.get('message', '未知错误'),
-                        error.get('line', 0),
-                        error.get('column', 0),
-                        'lexical'
-                    )
+            # 处理错误（批量构建错误记录，格式与 add_error 一致）
+            result.errors.extend(
+                {
+                    'message': error,
+                    'line': 0,
+                    'column': 0,
+                    'stage': 'lexical',
+                    'type': 'error'
+                } if isinstance(error, str) else {
+                    'message': error.get('message', '未知错误'),
+                    'line': error.get('line', 0),
+                    'column': error.get('column', 0),
+                    'stage': 'lexical',
+                    'type': 'error'
+                }
+                for error in errors
+            )
             
-            # 生成统计信息
-            token_stats = self.lexical_analyzer.get_token_statistics()
-            result.statistics = {
-                'total_tokens': len(tokens),
-                'total_lines': max(token.line for token in tokens) if tokens else 0,
-                'total_characters': len(source_code),
-                'token_counts': token_stats
-            }
+            # 仅需Token时跳过统计信息
+            if not cfg.skip_statistics:
+                # 生成统计信息（类型数量由词法分析器在分析时累计）
+                result.statistics = {
+                    'total_tokens': len(tokens),
+                    # Token按位置顺序产生，最后一个Token（EOF）的行号即最大行号
+                    'total_lines': tokens[-1].line if tokens else 0,
+                    'total_characters': len(source_code),
+                    'token_counts': analyzer.get_token_statistics()
+                }
             
             return len(errors) == 0
             
@@ -419,53 +481,139 @@ class Compiler:
         result.add_error("代码生成功能尚未实现", stage="codegen")
         return False
     
-    def _generate_output_files(self, result: CompilationResult, output_file: str):
+    def _generate_output_files(self, result: CompilationResult, output_file: str,
+                               source_code: str = ""):
         """
         生成输出文件
         
         Args:
             result: 编译结果
             output_file: 输出文件路径
+            source_code: 源代码（用于HTML报告，直接复用编译时已读入的内容）
         """
+        # 报告生成只在需要输出文件时导入
+        from .utils.formatters import format_token_table, format_statistics, create_html_report
+        
         try:
-            output_path = Path(output_file)
+            cfg = self.config
+            base, _ = os.path.splitext(output_file)
+            encoding = cfg.output_encoding
             
             # 生成Token文件
-            if self.config.output_tokens and result.tokens:
-                token_file = output_path.with_suffix('.tokens')
-                token_content = format_token_table(result.tokens)
-                error = write_file_safe(str(token_file), token_content, self.config.output_encoding)
+            if cfg.output_tokens and result.tokens:
+                token_file = base + '.tokens'
+                error = write_file_safe(token_file, format_token_table(result.tokens), encoding)
                 if not error:
-                    result.output_files.append(str(token_file))
+                    result.output_files.append(token_file)
             
             # 生成统计文件
             if result.statistics:
-                stats_file = output_path.with_suffix('.stats')
-                stats_content = format_statistics(result.statistics)
-                error = write_file_safe(str(stats_file), stats_content, self.config.output_encoding)
+                stats_file = base + '.stats'
+                error = write_file_safe(stats_file, format_statistics(result.statistics), encoding)
                 if not error:
-                    result.output_files.append(str(stats_file))
+                    result.output_files.append(stats_file)
             
             # 生成HTML报告
-            html_file = output_path.with_suffix('.html')
-            source_code = ""
-            if result.source_file and os.path.exists(result.source_file):
-                source_code, _ = read_file_safe(result.source_file)
-            
+            html_file = base + '.html'
             html_content = create_html_report(
                 result.tokens, 
                 result.statistics, 
                 result.errors + result.warnings,
                 source_code or ""
             )
-            error = write_file_safe(str(html_file), html_content, self.config.output_encoding)
+            error = write_file_safe(html_file, html_content, encoding)
             if not error:
-                result.output_files.append(str(html_file))
+                result.output_files.append(html_file)
             
         except Exception as e:
             result.add_error(f"生成输出文件失败: {str(e)}", stage="output")
 
 
+def _get_analyzer(language: str, rules_file: Optional[str] = None) -> Tuple[Optional[LexicalAnalyzer], Optional[str]]:
+    """
+    获取词法分析器，相同配置下复用已构建的规则
+    
+    缓存中只保存构建好规则的模板，每次返回它的副本（见 LexicalAnalyzer.copy），
+    不同编译器、不同线程各自使用独立的分析器，分析结果和错误信息互不影响。
+    
+    Args:
+        language: 目标语言
+        rules_file: 自定义词法规则文件（可选）
+    
+    Returns:
+        (词法分析器, 错误信息) 元组
+    """
+    rules_mtime = None
+    if rules_file and os.path.exists(rules_file):
+        rules_mtime = os.path.getmtime(rules_file)
+    key = (language, rules_file)
+    
+    cached = _ANALYZER_CACHE.get(key)
+    if cached is not None and cached[0] == rules_mtime:
+        template = cached[1]
+    else:
+        if language not in _SUPPORTED_LANGS:
+            return None, f"不支持的语言: {language}"
+        
+        if language == 'c':
+            template = create_c_analyzer()
+        else:
+            template = create_pascal_analyzer()
+        
+        # 加载自定义规则
+        if rules_file and not template.load_rules_from_file(rules_file):
+            return None, f"加载词法规则失败: {'; '.join(template.get_errors())}"
+        
+        _ANALYZER_CACHE[key] = (rules_mtime, template)
+    
+    return template.copy(), None
+
+
+# analyze_tokens 使用的固定配置
+_TOKENS_ONLY_OPTIONS = {
+    'enable_syntax': False,
+    'enable_semantic': False,
+    'enable_codegen': False,
+    'skip_statistics': True,
+    'output_tokens': False
+}
+
+
+def _get_compiler(language: str, options: Dict[str, Any], kwargs: Dict[str, Any]) -> 'Compiler':
+    """
+    获取便利函数使用的编译器，相同配置下复用缓存的实例
+    
+    Args:
+        language: 目标语言
+        options: 便利函数固定的配置项
+        kwargs: 用户传入的配置项（优先级高于options）
+    
+    Returns:
+        编译器实例
+    """
+    try:
+        key = (language, frozenset(options.items()), frozenset(kwargs.items()))
+    except TypeError:
+        # 配置值不可哈希（如列表）时不缓存
+        key = None
+    
+    compiler = _COMPILER_CACHE.get(key) if key is not None else None
+    if compiler is not None:
+        _COMPILER_CACHE.move_to_end(key)
+    else:
+        config = CompilerConfig()
+        config.language = language
+        config.from_dict(options)
+        config.from_dict(kwargs)
+        
+        compiler = Compiler(config)
+        if key is not None:
+            _COMPILER_CACHE[key] = compiler
+            if len(_COMPILER_CACHE) > _COMPILER_CACHE_SIZE:
+                _COMPILER_CACHE.popitem(last=False)
+    return compiler
+
+
 # 便利函数
 def compile_file(source_file: str, output_file: Optional[str] = None, 
                 language: Optional[str] = None, **kwargs) -> CompilationResult:
@@ -502,11 +650,7 @@ def compile_source(source_code: str, language: str = 'c', **kwargs) -> Compilati
     Returns:
         编译结果
     """
-    config = CompilerConfig()
-    config.language = language
-    config.from_dict(kwargs)
-    
-    compiler = Compiler(config)
+    compiler = _get_compiler(language, {}, kwargs)
     return compiler.compile_source(source_code)
 
 
@@ -522,14 +666,7 @@ def analyze_tokens(source_code: str, language: str = 'c', **kwargs) -> Tuple[Lis
     Returns:
         (Token列表, 错误列表)
     """
-    config = CompilerConfig()
-    config.language = language
-    config.enable_syntax = False
-    config.enable_semantic = False
-    config.enable_codegen = False
-    config.from_dict(kwargs)
-    
-    compiler = Compiler(config)
+    compiler = _get_compiler(language, _TOKENS_ONLY_OPTIONS, kwargs)
     result = compiler.compile_source(source_code)
     
     return result.tokens, result.errors
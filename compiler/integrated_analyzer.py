@@ -11,10 +11,14 @@
 - 分析结果的可视化
 """
 
+import io
 import os
 import sys
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import starmap
 from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 # 导入词法分析模块
 from .lexical import LexicalAnalyzer, Token, TokenType, create_c_analyzer, create_pascal_analyzer
@@ -30,30 +34,85 @@ from .syntax.parser_engine import parse_sentence
 from .semantic.semantic_analyzer import SemanticAnalyzer
 
 
-@dataclass
+# 每个分析器缓存的词法分析结果数量（交互编辑时通常只有一份源代码）
+_LEX_CACHE_SIZE = 8
+
+# Python 3.10 起 dataclass 支持 slots，旧版本退回普通实例属性
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# 缓存的Action/Goto表文本对象个数上限
+_TABLE_TEXT_CACHE_SIZE = 64
+
+# 逐Token比较时使用的类型常量（避免每次查找 TokenType 属性）
+_TT_EOF = TokenType.EOF
+
+# 转换为文法符号时跳过的Token类型
+_SKIP_TYPES = frozenset({
+    TokenType.EOF,
+    TokenType.WHITESPACE,
+    TokenType.NEWLINE,
+    TokenType.COMMENT,
+})
+
+# Token类型到文法符号的映射，未列出的类型使用Token值或类型名
+_SYMBOL_MAP = {
+    TokenType.IDENTIFIER: 'id',
+    TokenType.NUMBER: 'num',
+    TokenType.INTEGER_LITERAL: 'num',
+    TokenType.PLUS: '+',
+    TokenType.MINUS: '-',
+    TokenType.MULTIPLY: '*',
+    TokenType.DIVIDE: '/',
+    TokenType.LPAREN: '(',
+    TokenType.RPAREN: ')',
+    TokenType.SEMICOLON: ';',
+    TokenType.ASSIGN: ':=',
+    TokenType.EQUAL: '=',
+}
+
+
+class _LazyTableText:
+    """Action/Goto表的文本形式，首次转换为字符串时才格式化并缓存结果"""
+    
+    def __init__(self, table: Dict):
+        self.table = table
+        self._text = None
+    
+    def __str__(self) -> str:
+        if self._text is None:
+            lines = []
+            for state in sorted(self.table.keys()):
+                lines.append(f"状态 {state}:")
+                for sym, act in sorted(self.table[state].items()):
+                    lines.append(f"  on '{sym}': {act}")
+            self._text = "\n".join(lines)
+        return self._text
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class AnalysisResult:
-    """分析结果数据类"""
+    """分析结果数据类（失败时只需填写词法错误等少数字段，其余使用默认值）"""
     # 词法分析结果
     tokens: List[Token]
     lexical_errors: List[str]
     
     # 语法分析结果
-    first_follow: str
-    slr1_result: str
-    is_slr1: bool
-    lr0_states: str
-    lr0_transitions: str
-    lr0_svg: str
-    action_table: Dict
-    goto_table: Dict
-    lr1_svg: str
-    parse_steps: Any  # 改为Any类型以支持新的步骤格式
-    syntax_errors: List[str]
+    first_follow: str = ""
+    slr1_result: str = ""
+    is_slr1: bool = False
+    lr0_states: str = ""
+    lr0_transitions: str = ""
+    lr0_svg: str = ""
+    action_table: Dict = field(default_factory=dict)
+    goto_table: Dict = field(default_factory=dict)
+    lr1_svg: str = ""
+    parse_steps: Any = field(default_factory=list)  # 改为Any类型以支持新的步骤格式
+    syntax_errors: List[str] = field(default_factory=list)
     
     # 统计信息
-    token_count: int
-    analysis_time: float
-    success: bool
+    token_count: int = 0
+    analysis_time: float = 0.0
+    success: bool = False
     
     # AST相关结果（有默认值的字段必须放在最后）
     ast_root: Optional[Dict] = None
@@ -84,6 +143,10 @@ class IntegratedAnalyzer:
         self.lexical_analyzer = self._create_lexical_analyzer()
         self.grammar_text = self._get_default_grammar()
         self.errors = []
+        self._lex_cache: OrderedDict = OrderedDict()  # 源代码 -> 词法分析结果
+        self.lr0_states_limit: Optional[int] = None  # LR(0)状态文本的最大字符数，None表示不截断
+        self._table_texts: Dict[int, _LazyTableText] = {}  # id(表) -> 表的文本形式
+        self.build_lr1 = True  # 为False时不构造LR(1)表，可通过 get_lr1_output 按需获取
         
         # 初始化语义分析器
         self.semantic_analyzer = SemanticAnalyzer()
@@ -124,6 +187,57 @@ factor → ( expr ) | id | num"""
         """
         self.grammar_text = grammar_text
     
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _parse_grammar(grammar_text: str):
+        """解析文法并计算First/Follow集（按文法文本缓存，LR(0)和LR(1)构造共用）"""
+        return process_first_follow(grammar_text)
+    
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _build_parser_artifacts(grammar_text: str, lr0_states_limit: Optional[int] = None) -> tuple:
+        """构造文法相关的分析结果（按文法文本缓存）
+        
+        文法在多次源代码分析之间通常不变，缓存后只有首次分析需要构造LR自动机。
+        
+        Args:
+            grammar_text: 文法产生式文本
+            lr0_states_limit: LR(0)状态文本的最大字符数
+            
+        Returns:
+            (First/Follow字符串, SLR(1)冲突列表, LR(0)输出)
+        """
+        g = IntegratedAnalyzer._parse_grammar(grammar_text)
+        return (
+            g.get_first_follow_str(),
+            check_slr1(g),
+            build_lr0_output(grammar_text, lr0_states_limit, grammar=g)
+        )
+    
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _build_lr1_artifacts(grammar_text: str) -> tuple:
+        """构造LR(1)分析表和状态图（按文法文本缓存）
+        
+        Args:
+            grammar_text: 文法产生式文本
+            
+        Returns:
+            (action表, goto表, SVG字符串)
+        """
+        g = IntegratedAnalyzer._parse_grammar(grammar_text)
+        return build_lr1_output(grammar_text, minimize=True, grammar=g)
+    
+    def get_lr1_output(self) -> tuple:
+        """按需构造当前文法的LR(1)分析表和状态图
+        
+        build_lr1 为 False 时 analyze_code 不构造LR(1)，需要时调用此方法。
+        
+        Returns:
+            (action表, goto表, SVG字符串)
+        """
+        return self._build_lr1_artifacts(self.grammar_text)
+    
     def tokens_to_grammar_symbols(self, tokens: List[Token]) -> str:
         """将Token序列转换为文法符号序列
         
@@ -133,45 +247,44 @@ factor → ( expr ) | id | num"""
         Returns:
             文法符号序列字符串
         """
-        symbols = []
-        for token in tokens:
-            if token.type == TokenType.EOF:
-                continue
-            elif token.type == TokenType.WHITESPACE or token.type == TokenType.NEWLINE:
-                continue
-            elif token.type == TokenType.COMMENT:
-                continue
-            elif token.type == TokenType.IDENTIFIER:
-                symbols.append('id')
-            elif token.type == TokenType.NUMBER or token.type == TokenType.INTEGER_LITERAL:
-                symbols.append('num')
-            elif token.type == TokenType.PLUS:
-                symbols.append('+')
-            elif token.type == TokenType.MINUS:
-                symbols.append('-')
-            elif token.type == TokenType.MULTIPLY:
-                symbols.append('*')
-            elif token.type == TokenType.DIVIDE:
-                symbols.append('/')
-            elif token.type == TokenType.LPAREN:
-                symbols.append('(')
-            elif token.type == TokenType.RPAREN:
-                symbols.append(')')
-            elif token.type == TokenType.SEMICOLON:
-                symbols.append(';')
-            elif token.type == TokenType.ASSIGN:
-                symbols.append(':=')
-            elif token.type == TokenType.EQUAL:
-                symbols.append('=')
-            else:
-                # 其他Token类型映射为其值或类型名
-                if token.value:
-                    symbols.append(token.value)
-                else:
-                    symbols.append(token.type.value.lower())
+        symbols = [
+            _SYMBOL_MAP.get(token.type) or token.value or token.type.value.lower()
+            for token in tokens
+            if token.type not in _SKIP_TYPES
+        ]
         
         return ' '.join(symbols)
     
+    def _lex(self, source_code: str) -> Tuple[List[Token], List[str], Tuple[str, ...]]:
+        """词法分析并生成文法符号序列（按源代码缓存最近的结果）
+        
+        缓存中保存的是不可变的Token信息元组，每次调用都返回新的Token对象和列表，
+        调用方（如存入 AnalysisResult 后）修改它们不会影响缓存。
+        
+        Args:
+            source_code: 源代码文本
+            
+        Returns:
+            (Token列表, 词法错误列表, 文法符号序列)
+        """
+        cached = self._lex_cache.get(source_code)
+        if cached is not None:
+            self._lex_cache.move_to_end(source_code)
+        else:
+            # 在词法分析的同一遍中生成文法符号序列
+            infos = tuple(self.lexical_analyzer.iter_tokens(source_code))
+            symbols = tuple(_SYMBOL_MAP.get(token_type) or value or token_type.value.lower()
+                            for token_type, value, _, _ in infos if token_type not in _SKIP_TYPES)
+            lexical_errors = self.lexical_analyzer.get_errors() if hasattr(self.lexical_analyzer, 'get_errors') else []
+            
+            cached = (infos, tuple(lexical_errors), symbols)
+            self._lex_cache[source_code] = cached
+            if len(self._lex_cache) > _LEX_CACHE_SIZE:
+                self._lex_cache.popitem(last=False)
+        
+        infos, lexical_errors, symbols = cached
+        return list(starmap(Token, infos)), list(lexical_errors), symbols
+    
     def analyze_code(self, source_code: str, sentence: str = "") -> AnalysisResult:
         """分析源代码
         
@@ -186,36 +299,34 @@ factor → ( expr ) | id | num"""
         start_time = time.time()
         
         try:
-            # 1. 词法分析
-            tokens = self.lexical_analyzer.analyze(source_code)
-            lexical_errors = self.lexical_analyzer.get_errors() if hasattr(self.lexical_analyzer, 'get_errors') else []
+            # 1. 词法分析（同一源代码复用之前的结果）
+            tokens, lexical_errors, token_symbols = self._lex(source_code)
             
-            # 2. 如果没有提供句子，从Token生成
-            if not sentence.strip() and tokens:
-                sentence = self.tokens_to_grammar_symbols(tokens)
+            # 2. 如果没有提供句子，直接使用从Token生成的文法符号序列（不再拼接成字符串）
+            sentence_symbols = sentence.split() if sentence.strip() else token_symbols
             
             # 3. 语法分析
             try:
-                # 处理First/Follow集
-                g = process_first_follow(self.grammar_text)
-                ff_str = g.get_first_follow_str()
+                # 构造First/Follow集、SLR(1)检查和LR(0)自动机（按文法缓存）
+                (ff_str, slr_conflicts,
+                 (state_str, trans_str, svg0)) = self._build_parser_artifacts(
+                    self.grammar_text, self.lr0_states_limit)
+                
+                # 构造LR(1)自动机（句子分析使用SLR(1)，LR(1)仅用于展示）
+                if self.build_lr1:
+                    action_table, goto_table, svg1 = self.get_lr1_output()
+                else:
+                    action_table, goto_table, svg1 = {}, {}, ""
                 
                 # 判断是否为SLR(1)
-                slr_conflicts = check_slr1(g)
                 is_slr1 = not slr_conflicts
                 slr_result = "SLR(1) 分析表无冲突，文法是 SLR(1) 文法。" if is_slr1 else "\n".join(slr_conflicts)
                 
-                # 构造LR(0)
-                state_str, trans_str, svg0 = build_lr0_output(self.grammar_text)
-                
-                # 构造LR(1)
-                action_table, goto_table, svg1 = build_lr1_output(self.grammar_text)
-                
                 # 分析句子
-                if sentence.strip():
+                if sentence_symbols:
                     # 强制使用SLR(1)方法，因为它能正常工作
                     used_method = "SLR(1)"
-                    parse_result = parse_sentence(self.grammar_text, sentence, method=used_method, build_ast=True)
+                    parse_result = parse_sentence(self.grammar_text, sentence_symbols, method=used_method, build_ast=True)
                     
                     # 处理新的返回格式
                     if isinstance(parse_result, dict):
@@ -293,7 +404,7 @@ factor → ( expr ) | id | num"""
             
             # 5. 计算统计信息
             analysis_time = time.time() - start_time
-            token_count = len([t for t in tokens if t.type != TokenType.EOF])
+            token_count = len([t for t in tokens if t.type is not _TT_EOF])
             success = len(lexical_errors) == 0 and len(syntax_errors) == 0 and len(semantic_errors) == 0
             
             return AnalysisResult(
@@ -328,24 +439,7 @@ factor → ( expr ) | id | num"""
             return AnalysisResult(
                 tokens=[],
                 lexical_errors=[f"分析失败: {str(e)}"],
-                first_follow="",
-                slr1_result="",
-                is_slr1=False,
-                lr0_states="",
-                lr0_transitions="",
-                lr0_svg="",
-                action_table={},
-                goto_table={},
-                lr1_svg="",
-                parse_steps=[],
-                syntax_errors=[],
-                ast_root=None,
-                ast_tree_string=None,
-                ast_dot_graph=None,
-                ast_svg=None,
-                token_count=0,
-                analysis_time=analysis_time,
-                success=False
+                analysis_time=analysis_time
             )
     
     def analyze_file(self, file_path: str, sentence: str = "") -> AnalysisResult:
@@ -365,25 +459,7 @@ factor → ( expr ) | id | num"""
         except FileNotFoundError:
             return AnalysisResult(
                 tokens=[],
-                lexical_errors=[f"文件未找到: {file_path}"],
-                first_follow="",
-                slr1_result="",
-                is_slr1=False,
-                lr0_states="",
-                lr0_transitions="",
-                lr0_svg="",
-                action_table={},
-                goto_table={},
-                lr1_svg="",
-                parse_steps=[],
-                syntax_errors=[],
-                ast_root=None,
-                ast_tree_string=None,
-                ast_dot_graph=None,
-                ast_svg=None,
-                token_count=0,
-                analysis_time=0.0,
-                success=False
+                lexical_errors=[f"文件未找到: {file_path}"]
             )
     
     def format_tokens(self, tokens: List[Token]) -> str:
@@ -395,18 +471,18 @@ factor → ( expr ) | id | num"""
         Returns:
             格式化的字符串
         """
-        lines = []
-        lines.append("词法分析结果:")
-        lines.append("-" * 50)
-        lines.append(f"{'序号':<4} {'类型':<20} {'值':<15} {'位置':<10}")
-        lines.append("-" * 50)
+        buf = io.StringIO()
+        buf.write("词法分析结果:\n")
+        buf.write("-" * 50 + "\n")
+        buf.write(f"{'序号':<4} {'类型':<20} {'值':<15} {'位置':<10}\n")
+        buf.write("-" * 50)
         
         for i, token in enumerate(tokens, 1):
-            if token.type != TokenType.EOF:
+            if token.type is not _TT_EOF:
                 position = f"{token.line}:{token.column}" if hasattr(token, 'line') else "N/A"
-                lines.append(f"{i:<4} {token.type.value:<20} {token.value:<15} {position:<10}")
+                buf.write(f"\n{i:<4} {token.type.value:<20} {token.value:<15} {position:<10}")
         
-        return "\n".join(lines)
+        return buf.getvalue()
     
     def format_action_goto_table(self, action_table: Dict, goto_table: Dict) -> Tuple[str, str]:
         """格式化Action-Goto表
@@ -418,18 +494,17 @@ factor → ( expr ) | id | num"""
         Returns:
             (action_str, goto_str) 格式化的表格字符串
         """
-        def format_table(table):
-            lines = []
-            for state in sorted(table.keys()):
-                lines.append(f"状态 {state}:")
-                for sym, act in sorted(table[state].items()):
-                    lines.append(f"  on '{sym}': {act}")
-            return "\n".join(lines)
-        
-        action_str = format_table(action_table)
-        goto_str = format_table(goto_table)
-        
-        return action_str, goto_str
+        return str(self._table_text(action_table)), str(self._table_text(goto_table))
+    
+    def _table_text(self, table: Dict) -> _LazyTableText:
+        """取表对应的文本对象（LR(1)表按文法缓存，同一张表只格式化一次）"""
+        text = self._table_texts.get(id(table))
+        if text is None or text.table is not table:
+            text = _LazyTableText(table)
+            if len(self._table_texts) >= _TABLE_TEXT_CACHE_SIZE:
+                self._table_texts.clear()
+            self._table_texts[id(table)] = text
+        return text
 
 
 # 便捷函数
@@ -13,7 +13,9 @@
 """
 
 import gradio as gr
+import io
 import json
+import os
 from typing import List, Dict, Any, Optional, Tuple
 import traceback
 
@@ -25,6 +27,17 @@ from .integrated_analyzer import (
 
 # 导入AST相关模块
 from .syntax.ast_nodes import ASTVisualizer
+from .lexical import TokenType
+
+
+# 逐Token比较时使用的类型常量（避免每次查找 TokenType 属性）
+_TT_EOF = TokenType.EOF
+
+# 界面中LR(0)状态文本的最大显示长度
+_LR0_STATES_DISPLAY_LIMIT = 1000
+
+# 分析步骤表的行格式（预先绑定 str.format，避免每行重新解析格式）
+_PARSE_ROW_FMT = "\n{:<4} {:<15} {:<20} {:<20} {:<30} {:<15}".format
 
 
 class IntegratedWebApp:
@@ -36,11 +49,15 @@ class IntegratedWebApp:
         self.analyzer = None
         self.current_language = 'c'
         self.analysis_result = None
+        # 设置环境变量 ANALYZER_DEBUG=1 时在错误信息中附带调用栈
+        self.debug = os.environ.get("ANALYZER_DEBUG") == "1"
         
     def create_analyzer(self, language: str):
         """创建分析器"""
         self.current_language = language
         self.analyzer = create_integrated_analyzer(language)
+        self.analyzer.lr0_states_limit = _LR0_STATES_DISPLAY_LIMIT
+        self.analyzer.build_lr1 = False  # 界面不展示LR(1)表
         return f"已创建{language.upper()}语言分析器"
     
     def analyze_source_code(self, source_code: str, language: str, custom_grammar: str, sentence: str) -> Tuple[str, str, str, str, str, str, str, str]:
@@ -61,7 +78,10 @@ class IntegratedWebApp:
             
             # 执行分析
             self.analysis_result = self.analyzer.analyze_code(source_code, sentence)
-            
+        except Exception as e:
+            return "", "", "", "", "", self._format_exception("分析过程中出现错误", e), "", ""
+        
+        try:
             # 格式化结果
             lexical_result = self._format_lexical_result()
             syntax_result = self._format_syntax_result()
@@ -75,32 +95,38 @@ class IntegratedWebApp:
             return lexical_result, syntax_result, ast_tree, ast_graph, parse_steps, errors, stats, semantic_output
             
         except Exception as e:
-            error_msg = f"分析过程中出现错误:\n{str(e)}\n\n详细信息:\n{traceback.format_exc()}"
-            return "", "", "", "", "", error_msg, "", ""
+            return "", "", "", "", "", self._format_exception("格式化分析结果时出现错误", e), "", ""
+    
+    def _format_exception(self, title: str, error: Exception) -> str:
+        """格式化异常信息（仅在调试模式下附带完整调用栈）"""
+        error_msg = f"{title}:\n{str(error)}"
+        if self.debug:
+            error_msg += f"\n\n详细信息:\n{traceback.format_exc()}"
+        return error_msg
     
     def _format_lexical_result(self) -> str:
         """格式化词法分析结果"""
         if not self.analysis_result or not self.analysis_result.tokens:
             return "无词法分析结果"
         
-        lines = []
-        lines.append("=== 词法分析结果 ===")
-        lines.append(f"Token总数: {self.analysis_result.token_count}")
-        lines.append("-" * 60)
-        lines.append(f"{'序号':<4} {'类型':<20} {'值':<20} {'位置':<10}")
-        lines.append("-" * 60)
+        buf = io.StringIO()
+        buf.write("=== 词法分析结果 ===\n")
+        buf.write(f"Token总数: {self.analysis_result.token_count}\n")
+        buf.write("-" * 60 + "\n")
+        buf.write(f"{'序号':<4} {'类型':<20} {'值':<20} {'位置':<10}\n")
+        buf.write("-" * 60)
         
         for i, token in enumerate(self.analysis_result.tokens, 1):
-            if hasattr(token, 'type') and token.type.value != 'EOF':
+            if getattr(token, 'type', _TT_EOF) is not _TT_EOF:
                 position = f"{getattr(token, 'line', 'N/A')}:{getattr(token, 'column', 'N/A')}"
-                lines.append(f"{i:<4} {token.type.value:<20} {str(token.value):<20} {position:<10}")
+                buf.write(f"\n{i:<4} {token.type.value:<20} {str(token.value):<20} {position:<10}")
         
         if self.analysis_result.lexical_errors:
-            lines.append("\n=== 词法错误 ===")
+            buf.write("\n\n=== 词法错误 ===")
             for error in self.analysis_result.lexical_errors:
-                lines.append(f"❌ {error}")
+                buf.write(f"\n❌ {error}")
         
-        return "\n".join(lines)
+        return buf.getvalue()
     
     def _format_syntax_result(self) -> str:
         """格式化语法分析结果"""
@@ -123,7 +149,7 @@ class IntegratedWebApp:
         # LR(0)状态
         if self.analysis_result.lr0_states:
             lines.append("\n--- LR(0)状态 ---")
-            lines.append(self.analysis_result.lr0_states[:1000] + "..." if len(self.analysis_result.lr0_states) > 1000 else self.analysis_result.lr0_states)
+            lines.append(self.analysis_result.lr0_states)  # 分析器已按显示长度截断
         
         return "\n".join(lines)
     
@@ -159,12 +185,14 @@ class IntegratedWebApp:
         if not self.analysis_result or not self.analysis_result.parse_steps:
             return "无分析步骤"
         
-        lines = []
-        lines.append("=== 语法分析步骤 ===")
-        lines.append("-" * 100)
-        lines.append(f"{'步骤':<4} {'栈':<15} {'符号':<20} {'输入':<20} {'动作':<30} {'AST操作':<15}")
-        lines.append("-" * 100)
+        buf = io.StringIO()
+        buf.write("=== 语法分析步骤 ===\n")
+        buf.write("-" * 100 + "\n")
+        buf.write(f"{'步骤':<4} {'栈':<15} {'符号':<20} {'输入':<20} {'动作':<30} {'AST操作':<15}\n")
+        buf.write("-" * 100)
         
+        write = buf.write
+        row_format = _PARSE_ROW_FMT
         for step in self.analysis_result.parse_steps:
             if isinstance(step, dict):
                 # 新格式
@@ -175,46 +203,47 @@ class IntegratedWebApp:
                 action = step.get('action', '')
                 ast_action = step.get('ast_action', '')
                 
-                lines.append(f"{str(step_num):<4} {stack:<15} {symbols:<20} {input_str:<20} {action:<30} {ast_action:<15}")
+                write(row_format(str(step_num), stack, symbols, input_str, action, ast_action))
             else:
                 # 兼容旧格式
                 if len(step) >= 5:
-                    lines.append(f"{str(step[0]):<4} {str(step[1]):<15} {str(step[2]):<20} {str(step[3]):<20} {str(step[4]):<30} {'N/A':<15}")
+                    write(row_format(str(step[0]), str(step[1]), str(step[2]), str(step[3]), str(step[4]), 'N/A'))
         
-        return "\n".join(lines)
+        return buf.getvalue()
     
     def _format_errors(self) -> str:
         """格式化错误信息"""
         if not self.analysis_result:
             return "无错误信息"
         
-        lines = []
+        buf = io.StringIO()
         
         # 词法错误
         if self.analysis_result.lexical_errors:
-            lines.append("=== 词法错误 ===")
+            buf.write("=== 词法错误 ===\n")
             for error in self.analysis_result.lexical_errors:
-                lines.append(f"❌ {error}")
-            lines.append("")
+                buf.write(f"❌ {error}\n")
+            buf.write("\n")
         
         # 语法错误
         if self.analysis_result.syntax_errors:
-            lines.append("=== 语法错误 ===")
+            buf.write("=== 语法错误 ===\n")
             for error in self.analysis_result.syntax_errors:
-                lines.append(f"❌ {error}")
-            lines.append("")
+                buf.write(f"❌ {error}\n")
+            buf.write("\n")
 
         # 语义错误
         if hasattr(self.analysis_result, 'semantic_errors') and self.analysis_result.semantic_errors:
-            lines.append("=== 语义错误 ===")
+            buf.write("=== 语义错误 ===\n")
             for error in self.analysis_result.semantic_errors:
-                lines.append(f"❌ {error}")
-            lines.append("")
+                buf.write(f"❌ {error}\n")
+            buf.write("\n")
         
-        if not lines:
-            lines.append("✅ 无错误")
+        if not buf.tell():
+            return "✅ 无错误"
         
-        return "\n".join(lines)
+        # 去掉最后一行的换行符
+        return buf.getvalue()[:-1]
 
     def _format_semantic_result(self) -> str:
         """格式化语义分析结果"""
@@ -6,6 +6,8 @@
 
 class Quadruple:
     """四元式结构类"""
+    __slots__ = ('op', 'arg1', 'arg2', 'result')
+
     def __init__(self, op, arg1, arg2, result):
         self.op = op        # 操作符，如 +、*、:=、GOTO、LABEL 等
         self.arg1 = arg1    # 操作数1
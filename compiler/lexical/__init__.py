@@ -11,17 +11,20 @@
 """
 
 from .analyzer import LexicalAnalyzer, LexicalRule, create_c_analyzer, create_pascal_analyzer, analyze_file
-from .token import Token, TokenType, TokenCategory, get_token_category
-from .automata import RegexToNFA, NFAToDFA, DFAMinimizer, NFA, DFA
+from .token import Token, TokenStream, TokenType, TokenCategory, get_token_category, PASCAL_KEYWORDS, C_KEYWORDS
+from .automata import RegexToNFA, NFAToDFA, DFAMinimizer, NFA, DFA, LazyDFA
 
 __all__ = [
     # 核心类
     'LexicalAnalyzer',
     'LexicalRule',
     'Token',
+    'TokenStream',
     'TokenType',
     'TokenCategory',
     'get_token_category',
+    'PASCAL_KEYWORDS',
+    'C_KEYWORDS',
     
     # 自动机相关
     'RegexToNFA',
@@ -29,6 +32,7 @@ __all__ = [
     'DFAMinimizer',
     'NFA',
     'DFA',
+    'LazyDFA',
     
     # 便捷函数
     'create_c_analyzer',
@@ -11,11 +11,299 @@
 """
 
 import re
-from typing import List, Dict, Optional, Tuple
-from .token import Token, TokenType
+import sys
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from functools import lru_cache
+from itertools import starmap
+from operator import attrgetter
+from typing import FrozenSet, Iterable, Iterator, List, Dict, Optional, Sequence, Tuple
+from .token import C_KEYWORDS, PASCAL_KEYWORDS, Token, TokenStream, TokenType
 from .automata import RegexToNFA, NFAToDFA, DFAMinimizer, NFA, DFA
 
 
+# 用于建立换行符位置表
+_NEWLINE_RE = re.compile(r'\n')
+
+# 取Token类型，用于统计
+_GET_TYPE = attrgetter('type')
+
+# 取TokenType的名称，用于按列生成Token表格
+# （读成员的 _value_ 属性：Enum.value 是Python层的描述符，每次访问都要调用一次函数）
+_GET_VALUE = attrgetter('_value_')
+
+# 不产生Token的类型
+_SKIPPED_TYPES = frozenset((TokenType.WHITESPACE, TokenType.COMMENT))
+
+# 只能匹配以空白字符开头的文本的规则模式，如 \n、[ \t]+
+_WHITESPACE_PATTERN_RE = re.compile(r'(?:\\[ntr]|[ \t]|\[(?:\\[ntr]|[ \t])+\])[+*]?')
+
+# 不含正则元字符的纯字面量模式（如 :=、\+\+），以及其中的转义
+_LITERAL_PATTERN_RE = re.compile(r'(?:[^\\.^$*+?{}\[\]|()]|\\[^\w])+')
+_ESCAPE_RE = re.compile(r'\\(.)')
+
+# 标准的标识符模式，使用它时关键字可以直接放进合并正则
+_IDENTIFIER_PATTERN = r'[a-zA-Z_][a-zA-Z0-9_]*'
+
+# 推断模式首字符时使用的ASCII字符集，直接由 re 判定，与 \d、\w、\s 的实际含义一致
+# （例如 \s 还包括 \x1c-\x1f）
+_ASCII_CHARS = [chr(code) for code in range(128)]
+_ASCII_DIGITS = frozenset(filter(re.compile(r'\d').match, _ASCII_CHARS))
+_ASCII_WORD = frozenset(filter(re.compile(r'\w').match, _ASCII_CHARS))
+_ASCII_SPACE = frozenset(filter(re.compile(r'\s').match, _ASCII_CHARS))
+
+# 至少重复一次的 {m}、{m,}、{m,n} 量词（m >= 1）
+_REPEAT_AT_LEAST_ONCE_RE = re.compile(r'\{[1-9]\d*(?:,\d*)?\}')
+
+# 转义序列可匹配的字符：(ASCII字符集, 是否还可能匹配非ASCII字符)
+_ESCAPE_CHARS = {
+    'd': (_ASCII_DIGITS, True),
+    'w': (_ASCII_WORD, True),
+    's': (_ASCII_SPACE, True),
+    'n': (frozenset('\n'), False),
+    't': (frozenset('\t'), False),
+    'r': (frozenset('\r'), False),
+    'f': (frozenset('\f'), False),
+    'v': (frozenset('\v'), False),
+}
+
+
+class _KeywordTypes(dict):
+    """关键字原始拼写 -> Token类型，首次遇到某种大小写写法时转为小写查表并记住结果"""
+    
+    def __init__(self, keywords: Dict[str, TokenType]):
+        super().__init__(keywords)
+        self.keywords = keywords
+    
+    def __missing__(self, value: str) -> TokenType:
+        token_type = self[value] = self.keywords[value.lower()]
+        return token_type
+
+
+def _has_top_level_alternation(pattern: str) -> bool:
+    """判断模式在最外层是否含有 |（此时模式开头的判断不能只看第一个分支）"""
+    depth = 0
+    in_class = False
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return True
+    return False
+
+
+def _escape_chars(char: str) -> Optional[Tuple[FrozenSet[str], bool]]:
+    """转义序列 \\char 可匹配的字符，无法确定时返回None"""
+    if char in _ESCAPE_CHARS:
+        return _ESCAPE_CHARS[char]
+    if char.isascii() and not char.isalnum() and char != '_':
+        return frozenset(char), False  # 转义的标点
+    return None
+
+
+def _class_chars(pattern: str) -> Optional[Tuple[int, Tuple[FrozenSet[str], bool]]]:
+    """解析模式开头的字符类 [...]，返回 (字符类之后的位置, 可匹配的字符)，无法确定时返回None"""
+    if pattern[1:2] in ('^', ']', ''):
+        return None
+    chars = set()
+    non_ascii = False
+    i = 1
+    length = len(pattern)
+    while i < length and pattern[i] != ']':
+        char = pattern[i]
+        if char == '\\':
+            escaped = _escape_chars(pattern[i + 1]) if i + 1 < length else None
+            if escaped is None or pattern[i + 2:i + 3] == '-':
+                return None
+            chars |= escaped[0]
+            non_ascii |= escaped[1]
+            i += 2
+        elif i + 2 < length and pattern[i + 1] == '-' and pattern[i + 2] != ']':
+            high = pattern[i + 2]
+            if high == '\\' or high < char:
+                return None
+            chars.update(chr(code) for code in range(ord(char), min(ord(high), 127) + 1))
+            non_ascii |= not high.isascii()
+            i += 3
+        else:
+            if char.isascii():
+                chars.add(char)
+            else:
+                non_ascii = True
+            i += 1
+    if i >= length:
+        return None
+    return i + 1, (frozenset(chars), non_ascii)
+
+
+def _first_chars(pattern: str) -> Optional[Tuple[FrozenSet[str], bool]]:
+    """保守地推断模式匹配的文本可能以哪些字符开头
+    
+    只分析模式的第一个元素（字面字符、转义序列或字符类），且要求它不能出现零次：
+    其后的量词只接受 +、+? 和下限至少为1的 {m,n}，其他无法精确建模的写法一律返回None。
+    
+    Returns:
+        (可能的ASCII首字符集合, 是否还可能以非ASCII字符开头)，无法确定时返回None
+    """
+    if not pattern or _has_top_level_alternation(pattern):
+        return None
+    head = pattern[0]
+    if head == '\\':
+        chars = _escape_chars(pattern[1]) if len(pattern) > 1 else None
+        end = 2
+    elif head == '[':
+        parsed = _class_chars(pattern)
+        if parsed is None:
+            return None
+        end, chars = parsed
+    elif head in '().^$|?*+{}':
+        return None
+    else:
+        chars = (frozenset(head), False) if head.isascii() else (frozenset(), True)
+        end = 1
+    if chars is None or pattern[end:end + 1] in ('?', '*'):
+        return None
+    if pattern.startswith('{', end) and not _REPEAT_AT_LEAST_ONCE_RE.match(pattern, end):
+        return None
+    return chars
+
+
+def _cannot_start_with_whitespace(pattern: str) -> bool:
+    """保守地判断模式匹配的文本一定不以空白字符开头（无法确定时返回False）"""
+    chars = _first_chars(pattern)
+    return chars is not None and not chars[0] & _ASCII_SPACE
+
+
+def _build_dispatch(rules: List['LexicalRule']) -> Tuple[Dict[str, list], list]:
+    """按首字符建立规则分派表
+    
+    Returns:
+        (ASCII字符 -> 可能在该字符处匹配的 (匹配方法, Token类型) 列表,
+         非ASCII字符处可能匹配的列表)，列表内保持规则的优先级顺序
+    """
+    analyzed = [(rule.regex.match, rule.token_type, _first_chars(rule.pattern)) for rule in rules]
+    table = {
+        chr(code): [(match, token_type) for match, token_type, chars in analyzed
+                    if chars is None or chr(code) in chars[0]]
+        for code in range(128)
+    }
+    others = [(match, token_type) for match, token_type, chars in analyzed
+              if chars is None or chars[1]]
+    return table, others
+
+
+def _iter_rule_matches(dispatch: Dict[str, list], others: list, text: str):
+    """逐条规则尝试匹配（规则无法合并成一个正则时使用），每个位置只尝试首字符可能匹配的规则
+    
+    与 finditer 一致：依次产生 (匹配对象, Token类型)，没有规则匹配的字符直接跳过。
+    """
+    position = 0
+    length = len(text)
+    while position < length:
+        for match_rule, token_type in dispatch.get(text[position], others):
+            match = match_rule(text, position)
+            if match and match.end() > position:
+                yield match, token_type
+                position = match.end()
+                break
+        else:
+            position += 1
+
+
+def _locate(newlines: List[int], offset: int) -> Tuple[int, int]:
+    """根据换行符位置表计算文本偏移对应的 (行号, 列号)，均从1开始"""
+    line = bisect_left(newlines, offset)
+    return line + 1, offset - newlines[line - 1] if line else offset + 1
+
+
+@lru_cache(maxsize=32)
+def _compile_master(rules: Tuple['LexicalRule', ...], keywords: Tuple[Tuple[str, TokenType], ...]):
+    """将所有规则按优先级合并成一个带命名分组的正则
+    
+    正则的多选结构按从左到右的顺序尝试，与逐条规则匹配时"先匹配者优先"的语义一致。
+    连续的纯字面量规则（如各种运算符）合并到同一个分组中，不再各占一个命名分组，
+    re 可以对它们提取公共前缀、按首字符筛选；命中后按匹配文本查出Token类型。
+    同一语言的分析器共享规则对象（见 LexicalAnalyzer.add_rules），按规则和关键字表缓存结果，
+    每次创建分析器时不必重新拼接和编译。
+    
+    Returns:
+        (合并后的正则, 分组名 -> Token类型, 字面量分组名 -> {文本: Token类型})，
+        某条规则无法放入多选结构时正则为None
+    """
+    group_types = {}
+    literal_groups = {}
+    pieces = []
+    literal_run: List[LexicalRule] = []
+    for i, rule in _master_order(rules) + [(None, None)]:
+        if rule is not None and _LITERAL_PATTERN_RE.fullmatch(rule.pattern):
+            literal_run.append(rule)
+            continue
+        if literal_run:
+            name = f"l{len(literal_groups)}"
+            types = literal_groups[name] = {}
+            for literal in literal_run:
+                # 相同文本的字面量以先出现者为准，与多选结构的匹配顺序一致
+                types.setdefault(_ESCAPE_RE.sub(r'\1', literal.pattern), literal.token_type)
+            pieces.append(f"(?P<{name}>{'|'.join(literal.pattern for literal in literal_run)})")
+            literal_run = []
+        if rule is None:
+            continue
+        if (rule.token_type is TokenType.IDENTIFIER and rule.pattern == _IDENTIFIER_PATTERN
+                and keywords and 'kw' not in literal_groups):
+            # 关键字作为标识符前的一个分支直接识别出最终类型，标识符分支匹配到的一定不是关键字
+            literal_groups['kw'] = _KeywordTypes(dict(keywords))
+            alternatives = '|'.join(re.escape(keyword) for keyword, token_type in keywords)
+            pieces.append(f"(?P<kw>(?ai:{alternatives})(?![a-zA-Z0-9_]))")
+        group_types[f"g{i}"] = rule.token_type
+        pieces.append(f"(?P<g{i}>{rule.pattern})")
+    try:
+        master_re = re.compile("|".join(pieces))
+    except re.error:
+        master_re = None
+    return master_re, group_types, literal_groups
+
+
+def _master_order(rules: Sequence['LexicalRule']) -> List[Tuple[int, 'LexicalRule']]:
+    """合并正则中各规则的排列顺序，返回 (规则序号, 规则) 列表
+    
+    空白和换行在格式化的源代码中约占一半的Token，却排在优先级最低的位置，
+    每次都要先尝试完其他所有分支。若排在它们之前的规则都不可能匹配以空白字符开头的文本，
+    则把它们提到最前面：空白位置上本来就只有它们能匹配，结果不变。
+    """
+    indexed = list(enumerate(rules))
+    whitespace = [(i, rule) for i, rule in indexed if _WHITESPACE_PATTERN_RE.fullmatch(rule.pattern)]
+    if not whitespace:
+        return indexed
+    hoisted = {i for i, rule in whitespace}
+    last = whitespace[-1][0]
+    others = [(i, rule) for i, rule in indexed if i not in hoisted]
+    if all(_cannot_start_with_whitespace(rule.pattern) for i, rule in others if i < last):
+        return whitespace + others
+    return indexed
+
+
+@lru_cache(maxsize=512)
+def _build_automata(pattern: str, token_type: TokenType) -> Tuple[NFA, DFA]:
+    """将规则模式转换为NFA和DFA
+    
+    转换结果只取决于模式和Token类型，按二者缓存：不同语言的相同规则
+    （如注释、标识符、数字）以及重复创建的规则只构建一次，自动机对象在规则之间共享。
+    """
+    nfa = RegexToNFA().convert(pattern, token_type)
+    return nfa, NFAToDFA().convert(nfa)
+
+
 class LexicalRule:
     """词法规则类"""
     
@@ -23,20 +311,25 @@ class LexicalRule:
         self.pattern = pattern
         self.token_type = token_type
         self.priority = priority
-        self.regex = re.compile(pattern)
+        self._regex: Optional[re.Pattern] = None  # 首次使用时才编译，合并正则扫描时不需要单条规则的正则
         
         # 构建NFA/DFA（可选，用于高级功能）
         self.nfa: Optional[NFA] = None
         self.dfa: Optional[DFA] = None
+        self._automata_built = False  # 是否已尝试构建（构建失败时不再重复尝试）
+    
+    @property
+    def regex(self) -> re.Pattern:
+        """编译后的正则（按需编译）"""
+        if self._regex is None:
+            self._regex = re.compile(self.pattern)
+        return self._regex
     
     def build_automata(self):
         """构建自动机"""
+        self._automata_built = True
         try:
-            converter = RegexToNFA()
-            self.nfa = converter.convert(self.pattern, self.token_type)
-            
-            nfa_to_dfa = NFAToDFA()
-            self.dfa = nfa_to_dfa.convert(self.nfa)
+            self.nfa, self.dfa = _build_automata(self.pattern, self.token_type)
         except Exception:
             # 如果构建失败，保持为None
             pass
@@ -52,53 +345,31 @@ class LexicalRule:
 class LexicalAnalyzer:
     """词法分析器主类"""
     
+    # 规则组 -> 编译并排好序的规则对象，在所有分析器之间共享
+    _rule_cache: Dict[Tuple[Tuple[str, TokenType, int], ...], Tuple[LexicalRule, ...]] = {}
+    
     def __init__(self):
         self.rules: List[LexicalRule] = []
-        self.tokens: List[Token] = []
+        self.tokens: Sequence[Token] = []  # analyze 返回的列表，或 analyze_stream 返回的 TokenStream
         self.errors: List[str] = []
         self.current_line = 1
         self.current_column = 1
         self.keywords: Dict[str, TokenType] = {}
+        self._type_counter: Optional[Counter] = Counter()  # Token类型数量（需要时才统计，None 表示尚未统计）
+        self._rule_keys: List[int] = []  # 与 self.rules 对应的排序键（负的优先级）
+        self._master_re = None  # 所有规则合并成的正则（按需构造，规则变化时失效）
+        self._group_types: Dict[str, TokenType] = {}  # 合并正则的分组名 -> Token类型
+        self._literal_groups: Dict[str, Dict[str, TokenType]] = {}  # 字面量分组名 -> {文本: Token类型}
+        self._master_keywords: Dict[str, TokenType] = {}  # 构造合并正则时使用的关键字表
+        self._dispatch = None  # 逐条匹配时按首字符的规则分派表（按需构造，规则变化时失效）
         
         # 初始化默认规则
         self._init_default_rules()
     
     def _init_default_rules(self):
         """初始化默认的词法规则（Pascal语言）"""
-        # Pascal关键字
-        keywords = {
-            'program': TokenType.PROGRAM,
-            'var': TokenType.VAR,
-            'const': TokenType.CONST,
-            'type': TokenType.TYPE,
-            'function': TokenType.FUNCTION,
-            'procedure': TokenType.PROCEDURE,
-            'begin': TokenType.BEGIN,
-            'end': TokenType.END,
-            'if': TokenType.IF,
-            'then': TokenType.THEN,
-            'else': TokenType.ELSE,
-            'while': TokenType.WHILE,
-            'do': TokenType.DO,
-            'for': TokenType.FOR,
-            'to': TokenType.TO,
-            'downto': TokenType.DOWNTO,
-            'repeat': TokenType.REPEAT,
-            'until': TokenType.UNTIL,
-            'case': TokenType.CASE,
-            'of': TokenType.OF,
-            'integer': TokenType.INTEGER,
-            'real': TokenType.REAL,
-            'boolean': TokenType.BOOLEAN,
-            'char': TokenType.CHAR,
-            'string': TokenType.STRING,
-            'mod': TokenType.MOD,
-            'div': TokenType.DIV,
-            'and': TokenType.AND,
-            'or': TokenType.OR,
-            'not': TokenType.NOT,
-        }
-        self.keywords = keywords
+        # Pascal关键字（复制一份，修改分析器的关键字表不影响共享的常量）
+        self.keywords = dict(PASCAL_KEYWORDS)
         
         # 词法规则（按优先级排序）
         rules = [
@@ -106,9 +377,9 @@ class LexicalAnalyzer:
             (r'\{[^}]*\}', TokenType.COMMENT, 10),
             (r'//.*', TokenType.COMMENT, 10),
             
-            # 字符串和字符字面量
-            (r"'([^'\\]|\\.)*'", TokenType.STRING_LITERAL, 9),
-            (r"'([^'\\]|\\.)'?", TokenType.CHAR_LITERAL, 9),
+            # 字符串和字符字面量（展开循环写法：每个字符只有一种匹配方式，未闭合时回溯是线性的）
+            (r"'[^'\\]*(?:\\.[^'\\]*)*'", TokenType.STRING_LITERAL, 9),
+            (r"'(?:[^'\\]|\\.)'?", TokenType.CHAR_LITERAL, 9),
             
             # 数字
             (r'\d+\.\d+', TokenType.NUMBER, 8),  # 实数
@@ -145,49 +416,14 @@ class LexicalAnalyzer:
             (r'[ \t]+', TokenType.WHITESPACE, 1),
         ]
         
-        for pattern, token_type, priority in rules:
-            self.add_rule(pattern, token_type, priority)
+        self.add_rules(rules)
     
     def init_c_rules(self):
         """初始化C语言的词法规则"""
         self.rules.clear()
         
         # C语言关键字
-        c_keywords = {
-            'auto': TokenType.AUTO,
-            'break': TokenType.BREAK,
-            'case': TokenType.CASE,
-            'char': TokenType.CHAR,
-            'const': TokenType.CONST,
-            'continue': TokenType.CONTINUE,
-            'default': TokenType.DEFAULT,
-            'do': TokenType.DO,
-            'double': TokenType.DOUBLE,
-            'else': TokenType.ELSE,
-            'enum': TokenType.ENUM,
-            'extern': TokenType.EXTERN,
-            'float': TokenType.FLOAT,
-            'for': TokenType.FOR,
-            'goto': TokenType.GOTO,
-            'if': TokenType.IF,
-            'int': TokenType.INT,
-            'long': TokenType.LONG,
-            'register': TokenType.REGISTER,
-            'return': TokenType.RETURN,
-            'short': TokenType.SHORT,
-            'signed': TokenType.SIGNED,
-            'sizeof': TokenType.SIZEOF,
-            'static': TokenType.STATIC,
-            'struct': TokenType.STRUCT,
-            'switch': TokenType.SWITCH,
-            'typedef': TokenType.TYPEDEF,
-            'union': TokenType.UNION,
-            'unsigned': TokenType.UNSIGNED,
-            'void': TokenType.VOID,
-            'volatile': TokenType.VOLATILE,
-            'while': TokenType.WHILE,
-        }
-        self.keywords = c_keywords
+        self.keywords = dict(C_KEYWORDS)
         
         # C语言词法规则
         c_rules = [
@@ -195,12 +431,12 @@ class LexicalAnalyzer:
             (r'#[^\n]*', TokenType.PREPROCESSOR, 10),
             
             # 注释
-            (r'/\*[\s\S]*?\*/', TokenType.COMMENT, 10),  # 多行注释
+            (r'/\*[^*]*\*+(?:[^/*][^*]*\*+)*/', TokenType.COMMENT, 10),  # 多行注释
             (r'//.*', TokenType.COMMENT, 10),            # 单行注释
             
             # 字符串和字符字面量
-            (r'"([^"\\]|\\.)*"', TokenType.STRING_LITERAL, 9),
-            (r"'([^'\\]|\\.)'?", TokenType.CHAR_LITERAL, 9),
+            (r'"[^"\\]*(?:\\.[^"\\]*)*"', TokenType.STRING_LITERAL, 9),
+            (r"'(?:[^'\\]|\\.)'?", TokenType.CHAR_LITERAL, 9),
             
             # 数字字面量
             (r'0[xX][0-9a-fA-F]+[lLuU]*', TokenType.NUMBER, 8),  # 十六进制
@@ -267,15 +503,52 @@ class LexicalAnalyzer:
             (r'[ \t]+', TokenType.WHITESPACE, 1),
         ]
         
-        for pattern, token_type, priority in c_rules:
-            self.add_rule(pattern, token_type, priority)
+        self.add_rules(c_rules)
     
     def add_rule(self, pattern: str, token_type: TokenType, priority: int = 0):
         """添加词法规则"""
         rule = LexicalRule(pattern, token_type, priority)
-        self.rules.append(rule)
-        # 按优先级排序
-        self.rules.sort(key=lambda x: x.priority, reverse=True)
+        rule.regex  # 逐条添加的规则立即编译，模式有误时在此处报错
+        keys = self._rule_keys
+        if len(keys) != len(self.rules):
+            # self.rules 被直接修改过，重建排序键
+            keys[:] = [-r.priority for r in self.rules]
+        # 插入到同优先级规则之后，保持按优先级从高到低、同优先级按添加顺序排列
+        index = bisect_right(keys, -priority)
+        keys.insert(index, -priority)
+        self.rules.insert(index, rule)
+        self._master_re = None
+        self._dispatch = None
+    
+    def add_rules(self, rules: Iterable[Tuple[str, TokenType, int]]):
+        """批量添加词法规则 (模式, 类型, 优先级)，全部添加后只排序一次
+        
+        向空的分析器添加同一组规则时（如多次创建同一语言的分析器），
+        直接复用之前编译并排好序的规则对象。
+        """
+        rules = tuple(rules)
+        cached = self._rule_cache.get(rules) if not self.rules else None
+        if cached is not None:
+            self.rules.extend(cached)
+        else:
+            self.rules.extend(LexicalRule(pattern, token_type, priority)
+                              for pattern, token_type, priority in rules)
+            self.rules.sort(key=attrgetter('priority'), reverse=True)
+            if len(self.rules) == len(rules):
+                self._rule_cache[rules] = tuple(self.rules)
+        self._rule_keys = [-rule.priority for rule in self.rules]
+        self._master_re = None
+        self._dispatch = None
+    
+    def _build_master_re(self):
+        """构造所有规则合并成的正则（同一组规则和关键字表只构造一次，在分析器之间共享）
+        
+        某条规则无法放入多选结构时（如含有全局内联标志），返回False，退回逐条匹配。
+        """
+        self._master_keywords = dict(self.keywords)
+        self._master_re, self._group_types, self._literal_groups = _compile_master(
+            tuple(self.rules), tuple(self.keywords.items()))
+        return self._master_re is not None
     
     def load_rules_from_file(self, filename: str) -> bool:
         """从文件加载词法规则"""
@@ -310,94 +583,144 @@ class LexicalAnalyzer:
     
     def analyze(self, text: str) -> List[Token]:
         """执行词法分析"""
-        self.tokens = []
-        self.errors = []
-        self.current_line = 1
-        self.current_column = 1
+        # Token对象的构造由C实现的 starmap 驱动，不经过Python层循环
+        self.tokens = tokens = list(starmap(Token, self.iter_tokens(text)))
+        self._type_counter = None
+        
+        return tokens
+    
+    def analyze_stream(self, text: str) -> TokenStream:
+        """执行词法分析，结果以列式的 TokenStream 返回，不创建Token对象
+        
+        self.tokens 同样指向该 TokenStream，get_tokens_table 等方法照常可用。
+        """
+        self.tokens = stream = TokenStream.from_tuples(self.iter_tokens(text))
+        self._type_counter = None
+        
+        return stream
+    
+    def iter_tokens(self, text: str) -> Iterator[Tuple[TokenType, str, int, int]]:
+        """逐个产生Token信息 (类型, 值, 行号, 列号)，不创建Token对象
         
+        空白字符和注释不会产生，最后产生EOF；错误信息记录在 self.errors 中。
+        """
+        self.errors = errors = []
+        
+        if self._master_re is not None and self._master_keywords != self.keywords:
+            self._master_re = None  # 关键字表在合并正则构造之后被修改过
+        
+        if self.rules and (self._master_re is not None or self._build_master_re()):
+            # 一次 finditer 调用扫描整个文本，由命中的分组确定Token类型
+            group_types = self._group_types
+            literal_groups = self._literal_groups
+            matches = ((match, group_types.get(match.lastgroup) or literal_groups[match.lastgroup][match.group()])
+                       for match in self._master_re.finditer(text))
+            check_keywords = 'kw' not in literal_groups
+        else:
+            if self._dispatch is None:
+                self._dispatch = _build_dispatch(self.rules)
+            matches = _iter_rule_matches(*self._dispatch, text)
+            check_keywords = True
+        
+        # 行号和列号由换行符的位置表二分查找得到；Token按偏移递增产生，
+        # 查找下界取上一个Token所在的行，行号只会向前推进
+        newlines = [match.start() for match in _NEWLINE_RE.finditer(text)]
+        line_index = 0
+        
+        # 循环中用到的属性和方法预先绑定到局部变量，减少每个Token上的属性查找
+        keywords = self.keywords
+        keyword_types = frozenset(keywords.values())
+        identifier = TokenType.IDENTIFIER
+        identifier_types: Dict[str, TokenType] = {}  # 标识符原始拼写 -> 关键字或标识符类型
+        error_type = TokenType.ERROR
+        intern = sys.intern
         position = 0
-        while position < len(text):
-            matched = False
+        
+        for match, token_type in matches:
+            start, end = match.span()
+            if start == end:
+                continue  # 空匹配不前进，对应位置按未识别字符处理
             
-            # 尝试匹配每个规则
-            for rule in self.rules:
-                match = rule.match(text, position)
-                if match:
-                    value = match.group(0)
-                    token_type = rule.token_type
-                    
-                    # 检查是否为关键字
-                    if token_type == TokenType.IDENTIFIER and value.lower() in self.keywords:
-                        token_type = self.keywords[value.lower()]
-                    
-                    # 创建Token（跳过空白字符和注释）
-                    if token_type not in [TokenType.WHITESPACE, TokenType.COMMENT]:
-                        token = Token(token_type, value, self.current_line, self.current_column)
-                        self.tokens.append(token)
-                    
-                    # 更新位置信息
-                    if token_type == TokenType.NEWLINE:
-                        self.current_line += 1
-                        self.current_column = 1
-                    else:
-                        self.current_column += len(value)
-                    
-                    position = match.end()
-                    matched = True
-                    break
+            # 两次匹配之间跳过的字符都是未识别的字符，报告错误
+            if start != position:
+                for offset in range(position, start):
+                    line, column = _locate(newlines, offset)
+                    char = text[offset]
+                    errors.append(f"未识别的字符 '{char}' 在第 {line} 行第 {column} 列")
+                    yield error_type, char, line, column
+            position = end
             
-            if not matched:
-                # 未匹配的字符，报告错误
-                char = text[position]
-                error_msg = f"未识别的字符 '{char}' 在第 {self.current_line} 行第 {self.current_column} 列"
-                self.errors.append(error_msg)
-                
-                # 创建错误Token
-                error_token = Token(TokenType.ERROR, char, self.current_line, self.current_column)
-                self.tokens.append(error_token)
+            # 跳过空白字符和注释
+            if token_type in _SKIPPED_TYPES:
+                continue
+            
+            value = match.group()
+            
+            if token_type is identifier:
+                # 同名标识符共用一个字符串对象，下游比较时多数只需比较指针
+                value = intern(value)
                 
-                position += 1
-                self.current_column += 1
+                # 检查是否为关键字（同一拼写只做一次小写转换和关键字查找）
+                if check_keywords:
+                    token_type = identifier_types.get(value)
+                    if token_type is None:
+                        token_type = identifier_types[value] = keywords.get(value.lower(), identifier)
+            elif token_type in keyword_types:
+                # 由关键字分支直接识别出的关键字同样驻留
+                value = intern(value)
+            
+            line_index = bisect_left(newlines, start, line_index)
+            yield token_type, value, line_index + 1, start - newlines[line_index - 1] if line_index else start + 1
+        
+        for offset in range(position, len(text)):
+            line, column = _locate(newlines, offset)
+            char = text[offset]
+            errors.append(f"未识别的字符 '{char}' 在第 {line} 行第 {column} 列")
+            yield error_type, char, line, column
         
-        # 添加EOF Token
-        eof_token = Token(TokenType.EOF, '', self.current_line, self.current_column)
-        self.tokens.append(eof_token)
+        line, column = _locate(newlines, len(text))
+        self.current_line = line
+        self.current_column = column
         
-        return self.tokens
+        # 产生EOF Token
+        yield TokenType.EOF, '', line, column
     
     def analyze_with_automata(self, text: str) -> List[Token]:
         """使用自动机进行词法分析（实验性功能）"""
-        # 为所有规则构建自动机
+        # 为所有规则构建自动机（每条规则只构建一次；规则对象在同语言的分析器之间共享）
         for rule in self.rules:
-            if rule.dfa is None:
+            if not rule._automata_built:
                 rule.build_automata()
         
-        # 使用标准方法分析（自动机方法需要更复杂的实现）
+        # 使用标准方法分析：RegexToNFA 只支持正则的一个子集（否定字符类、非贪婪量词、
+        # 计数重复等都不支持），由自动机直接扫描会得到错误的Token
         return self.analyze(text)
     
     def get_tokens_table(self) -> List[List[str]]:
         """获取Token表格"""
-        table = []
-        table.append(["序号", "Token类型", "值", "行号", "列号"])
-        
-        for i, token in enumerate(self.tokens, 1):
-            table.append([
-                str(i),
-                token.type.value,
-                token.value,
-                str(token.line),
-                str(token.column)
-            ])
+        tokens = self.tokens
+        if isinstance(tokens, TokenStream):
+            # 列式存储时整列转换：行号、列号由 map(str, ...) 在C层批量转成字符串
+            rows = zip(map(str, range(1, len(tokens) + 1)), map(_GET_VALUE, tokens.types), tokens.values,
+                       map(str, tokens.lines), map(str, tokens.columns))
+            body = [[index, type_name, value, line, column] for index, type_name, value, line, column in rows]
+        else:
+            body = [[str(i), token.type.value, token.value, str(token.line), str(token.column)]
+                    for i, token in enumerate(tokens, 1)]
         
-        return table
+        return [["序号", "Token类型", "值", "行号", "列号"]] + body
+    
+    def _token_type_counts(self) -> Counter:
+        """各Token类型的数量（首次需要时由 Counter 在C层一次统计，之后复用）"""
+        if self._type_counter is None:
+            tokens = self.tokens
+            types = tokens.types if isinstance(tokens, TokenStream) else map(_GET_TYPE, tokens)
+            self._type_counter = Counter(types)
+        return self._type_counter
     
     def get_token_statistics(self) -> Dict[str, int]:
         """获取Token统计信息"""
-        stats = {}
-        for token in self.tokens:
-            token_name = token.type.value
-            stats[token_name] = stats.get(token_name, 0) + 1
-        return stats
+        return {token_type.value: count for token_type, count in self._token_type_counts().items()}
     
     def get_errors(self) -> List[str]:
         """获取错误列表"""
@@ -405,12 +728,27 @@ class LexicalAnalyzer:
     
     def has_errors(self) -> bool:
         """检查是否有错误"""
-        return len(self.errors) > 0 or any(token.type == TokenType.ERROR for token in self.tokens)
+        return len(self.errors) > 0 or self._token_type_counts()[TokenType.ERROR] > 0
+    
+    def copy(self) -> 'LexicalAnalyzer':
+        """创建使用同一组规则的新分析器
+        
+        规则对象、合并正则等只读的构建结果直接共享，不重新编译；
+        分析结果和错误信息各自独立，两个分析器可以在不同线程中同时使用。
+        """
+        analyzer = LexicalAnalyzer.__new__(LexicalAnalyzer)
+        analyzer.__dict__.update(self.__dict__)
+        analyzer.rules = list(self.rules)
+        analyzer._rule_keys = list(self._rule_keys)
+        analyzer.keywords = dict(self.keywords)
+        analyzer.clear()
+        return analyzer
     
     def clear(self):
         """清空分析结果"""
         self.tokens = []
         self.errors = []
+        self._type_counter = Counter()
         self.current_line = 1
         self.current_column = 1
     
@@ -444,20 +782,35 @@ def create_c_analyzer() -> LexicalAnalyzer:
     return analyzer
 
 
+@lru_cache(maxsize=32)
+def _analyze_text(content: str, language: str) -> Tuple[Tuple[Tuple[TokenType, str, int, int], ...], Tuple[str, ...]]:
+    """分析源代码文本（按 (文本, 语言) 缓存最近的结果，同一文件反复分析时直接复用）
+    
+    缓存的是不可变的Token信息 (类型, 值, 行号, 列号)，不是Token对象。
+    """
+    if language == 'c':
+        analyzer = create_c_analyzer()
+    else:
+        analyzer = create_pascal_analyzer()
+    
+    infos = tuple(analyzer.iter_tokens(content))
+    errors = analyzer.get_errors()
+    
+    return infos, tuple(errors)
+
+
 def analyze_file(filename: str, language: str = 'pascal') -> Tuple[List[Token], List[str]]:
     """分析文件"""
     try:
+        # 以文本方式整体读入：Token的值和列号都以字符计，且需要把 \r\n 统一为 \n；
+        # 用 mmap 按字节扫描会得到字节列号，源文件含中文注释时与字符列号不一致
         with open(filename, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        if language.lower() == 'c':
-            analyzer = create_c_analyzer()
-        else:
-            analyzer = create_pascal_analyzer()
-        
-        tokens = analyzer.analyze(content)
-        errors = analyzer.get_errors()
+        # 缓存中保存的是Token信息元组，每次都创建新的Token对象和列表，
+        # 调用方修改返回的列表或其中的Token都不会影响缓存
+        infos, errors = _analyze_text(content, language.lower())
         
-        return tokens, errors
+        return list(starmap(Token, infos)), list(errors)
     except Exception as e:
-        return [], [f"读取文件失败: {e}"]
\ No newline at end of file
+        return [], [f"读取文件失败: {e}"]
@@ -8,15 +8,20 @@
 - DFA (确定性有限自动机)
 - 正则表达式到NFA转换 (Thompson构造法)
 - NFA到DFA转换 (子集构造法)
+- 惰性DFA (模拟时按需进行子集构造)
 - DFA最小化
 """
 
-import graphviz
 import io
-from PIL import Image
-from typing import List, Dict, Set, Tuple, Optional, Union
+from collections import deque
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, List, Dict, Set, FrozenSet, Tuple, Optional, Union
 from .token import TokenType
 
+if TYPE_CHECKING:
+    # graphviz 和 PIL 只有可视化函数用到，调用时再导入，词法分析本身不加载它们
+    import graphviz
+    from PIL import Image
+
 
 class State:
     """自动机状态类"""
@@ -59,6 +64,7 @@ class NFA:
         self.accept_states: Set[State] = set()
         self.alphabet: Set[str] = set()
         self.state_counter = 0
+        self.eclosure: Dict[State, FrozenSet[State]] = {}  # 单个状态的ε闭包（预计算）
     
     def create_state(self) -> State:
         """创建新状态"""
@@ -84,8 +90,24 @@ class NFA:
         if symbol != 'ε':  # ε不加入字母表
             self.alphabet.add(symbol)
     
+    def precompute_epsilon_closures(self):
+        """为每个状态预先计算ε闭包，之后的闭包计算只需合并预计算结果"""
+        self.eclosure = {}
+        for state in self.states:
+            self.eclosure[state] = frozenset(self._search_epsilon_closure({state}))
+    
     def epsilon_closure(self, states: Set[State]) -> Set[State]:
         """计算状态集合的ε闭包"""
+        eclosure = self.eclosure
+        if eclosure and all(state in eclosure for state in states):
+            closure = set()
+            for state in states:
+                closure |= eclosure[state]
+            return closure
+        return self._search_epsilon_closure(states)
+    
+    def _search_epsilon_closure(self, states: Set[State]) -> Set[State]:
+        """沿ε转移搜索状态集合的闭包"""
         closure = set(states)
         stack = list(states)
         
@@ -104,6 +126,39 @@ class NFA:
         for state in states:
             result.update(state.get_transitions(symbol))
         return result
+    
+    def _step_table(self) -> Tuple[List[Optional[State]], List[Tuple[Tuple[str, int], ...]]]:
+        """构造扁平的转移表（子集构造使用）
+        
+        构造期间的转移仍是每个状态上的 符号 -> 状态集合 字典；子集构造只读不改，
+        因此先展平成以状态编号为下标的列表，每个状态只保留非ε转移，
+        目标状态集合连同其ε闭包一起预先并成整数位集。
+        
+        Returns:
+            (编号 -> 状态 的列表, 编号 -> ((符号, 转移后ε闭包的位集), ...) 的列表)
+        """
+        size = max(state.id for state in self.states) + 1
+        by_id: List[Optional[State]] = [None] * size
+        for state in self.states:
+            by_id[state.id] = state
+        
+        closure_bits = [0] * size
+        for state in self.states:
+            closure_bits[state.id] = _to_bits(self.epsilon_closure({state}))
+        
+        # 闭包对并集可分配：DFA状态的转移是其中各NFA状态这些位集的并
+        steps: List[Tuple[Tuple[str, int], ...]] = [()] * size
+        for state in self.states:
+            row = []
+            for symbol, targets in state.transitions.items():
+                if symbol != 'ε':
+                    bits = 0
+                    for target in targets:
+                        bits |= closure_bits[target.id]
+                    row.append((symbol, bits))
+            steps[state.id] = tuple(row)
+        
+        return by_id, steps
 
 
 class DFA:
@@ -116,111 +171,371 @@ class DFA:
         self.transitions: Dict[Tuple[str, str], str] = {}  # (状态, 符号) -> 目标状态
         self.alphabet: Set[str] = set()
         self.token_types: Dict[str, TokenType] = {}  # 状态 -> Token类型
+        self._table: Optional[Tuple[Dict[str, int], List[str], List[Dict[str, int]]]] = None  # 模拟用的转移表（按需构建）
     
     def add_state(self, state_id: str, nfa_states: Set[State]):
         """添加DFA状态"""
         self.states[state_id] = nfa_states
         
-        # 检查是否为接受状态
-        for nfa_state in nfa_states:
-            if nfa_state.is_accept:
-                self.accept_states.add(state_id)
-                if nfa_state.token_type:
-                    self.token_types[state_id] = nfa_state.token_type
-                break
+        # 检查是否为接受状态（含多个接受状态时取编号最小者，即优先级最高的规则，见 RegexToNFA.union_all）
+        accepting = [nfa_state for nfa_state in nfa_states if nfa_state.is_accept]
+        if accepting:
+            self.accept_states.add(state_id)
+            nfa_state = min(accepting, key=lambda state: state.id)
+            if nfa_state.token_type:
+                self.token_types[state_id] = nfa_state.token_type
     
     def add_transition(self, from_state: str, symbol: str, to_state: str):
         """添加状态转移"""
         self.transitions[(from_state, symbol)] = to_state
         self.alphabet.add(symbol)
+        self._table = None
     
     def get_transition(self, state: str, symbol: str) -> Optional[str]:
         """获取状态转移"""
         return self.transitions.get((state, symbol))
     
+    def _transition_table(self) -> Tuple[Dict[str, int], List[str], List[Dict[str, int]]]:
+        """将转移表整理为按状态编号索引的形式
+        
+        Returns:
+            (状态ID -> 编号, 编号 -> 状态ID, 编号 -> {符号: 目标状态编号})
+        """
+        if self._table is None:
+            ids: Dict[str, int] = {}
+            for state in self.states:
+                ids.setdefault(state, len(ids))
+            for (state, symbol), target in self.transitions.items():
+                ids.setdefault(state, len(ids))
+                ids.setdefault(target, len(ids))
+            rows: List[Dict[str, int]] = [{} for _ in ids]
+            for (state, symbol), target in self.transitions.items():
+                rows[ids[state]][symbol] = ids[target]
+            self._table = (ids, list(ids), rows)
+        return self._table
+    
     def simulate(self, input_string: str) -> Tuple[bool, Optional[TokenType]]:
         """模拟DFA运行"""
         if not self.start_state:
             return False, None
         
-        current_state = self.start_state
-        
-        for symbol in input_string:
-            next_state = self.get_transition(current_state, symbol)
-            if next_state is None:
+        # 每个字符只需一次列表下标和一次字典查找，不再为 (状态, 符号) 构造元组
+        ids, names, rows = self._transition_table()
+        state = ids.get(self.start_state)
+        if state is None:
+            # 开始状态不在状态表中且没有出边，只能接受空串
+            if input_string:
                 return False, None
-            current_state = next_state
+            current_state = self.start_state
+        else:
+            for symbol in input_string:
+                state = rows[state].get(symbol)
+                if state is None:
+                    return False, None
+            current_state = names[state]
         
         is_accept = current_state in self.accept_states
         token_type = self.token_types.get(current_state) if is_accept else None
         
         return is_accept, token_type
 
+    
+    def longest_match(self, text: str, position: int = 0) -> Optional[Tuple[int, Optional[TokenType]]]:
+        """从 position 开始运行DFA，按最长匹配原则返回被接受的最长前缀
+        
+        Args:
+            text: 输入文本
+            position: 开始位置
+            
+        Returns:
+            (最长接受前缀的结束位置, 对应的Token类型)，没有前缀被接受时返回None
+        """
+        if not self.start_state:
+            return None
+        
+        accept_states = self.accept_states
+        token_types = self.token_types
+        last = (position, token_types.get(self.start_state)) if self.start_state in accept_states else None
+        
+        ids, names, rows = self._transition_table()
+        state = ids.get(self.start_state)
+        if state is None:
+            return last
+        
+        for index in range(position, len(text)):
+            state = rows[state].get(text[index])
+            if state is None:
+                break
+            name = names[state]
+            if name in accept_states:
+                last = (index + 1, token_types.get(name))
+        
+        return last
+
+
+class LazyDFA:
+    """惰性DFA：模拟过程中按需进行子集构造
+    
+    NFAToDFA 一次性构造全部DFA状态，字符类大、选择分支多的正则可能产生大量
+    实际输入永远到达不了的状态。LazyDFA 只在模拟走到某个 (状态, 符号) 时才计算目标状态集合，
+    结果缓存起来供之后的输入复用；缓存的状态数超过上限时整体清空重建，内存占用有界。
+    接受状态与Token类型的判定规则与 DFA.add_state 相同（取编号最小的接受状态）。
+    """
+    
+    def __init__(self, nfa: NFA, cache_limit: int = 1024):
+        """
+        Args:
+            nfa: 要模拟的NFA（只读，模拟期间不能再修改）
+            cache_limit: 缓存的DFA状态数上限
+        """
+        self.nfa = nfa
+        self.cache_limit = max(cache_limit, 2)
+        self.cache_clears = 0  # 缓存被清空的次数
+        self._by_id, self._steps = nfa._step_table()
+        self._start_bits = _to_bits(nfa.epsilon_closure({nfa.start_state}))
+        self._reset()
+    
+    def set_cache_limit(self, limit: int):
+        """设置缓存的DFA状态数上限（至少为2），当前缓存超出上限时立即清空"""
+        self.cache_limit = max(limit, 2)
+        if len(self._members) > self.cache_limit:
+            self._reset()
+    
+    def _reset(self):
+        """清空缓存，只保留开始状态（编号0）"""
+        self._index: Dict[int, int] = {}                 # NFA状态位集 -> DFA状态编号
+        self._members: List[List[int]] = []              # DFA状态编号 -> NFA状态编号列表
+        self._rows: List[Dict[str, int]] = []            # DFA状态编号 -> {符号: 目标编号}，-1 表示死状态
+        self._accept: List[Optional[Tuple[Optional[TokenType]]]] = []  # 接受状态为 (Token类型,)，否则为None
+        self._add(self._start_bits)
+    
+    def _add(self, bits: int) -> int:
+        """登记一个新的DFA状态，返回其编号"""
+        members = list(_iter_bits(bits))
+        index = self._index[bits] = len(self._members)
+        self._members.append(members)
+        self._rows.append({})
+        by_id = self._by_id
+        accept = None
+        for state_id in members:
+            if by_id[state_id].is_accept:
+                accept = (by_id[state_id].token_type,)
+                break
+        self._accept.append(accept)
+        return index
+    
+    def _step(self, state: int, symbol: str) -> int:
+        """缓存未命中时计算 state 经 symbol 的目标状态（-1 表示死状态）"""
+        bits = 0
+        steps = self._steps
+        for state_id in self._members[state]:
+            for step_symbol, step_bits in steps[state_id]:
+                if step_symbol == symbol:
+                    bits |= step_bits
+        if not bits:
+            self._rows[state][symbol] = -1
+            return -1
+        
+        target = self._index.get(bits)
+        if target is None:
+            if len(self._members) >= self.cache_limit:
+                # 缓存已满：清空后重新登记目标状态，当前状态的编号随之失效，这条转移不再记录
+                self._reset()
+                self.cache_clears += 1
+                return self._index[bits] if bits in self._index else self._add(bits)
+            target = self._add(bits)
+        self._rows[state][symbol] = target
+        return target
+    
+    def simulate(self, input_string: str) -> Tuple[bool, Optional[TokenType]]:
+        """模拟DFA运行（与 DFA.simulate 相同的返回值）"""
+        state = 0
+        rows = self._rows
+        for symbol in input_string:
+            target = rows[state].get(symbol)
+            if target is None:
+                target = self._step(state, symbol)
+                rows = self._rows  # 缓存可能已被清空重建
+            if target < 0:
+                return False, None
+            state = target
+        
+        accept = self._accept[state]
+        if accept is None:
+            return False, None
+        return True, accept[0]
+    
+    def longest_match(self, text: str, position: int = 0) -> Optional[Tuple[int, Optional[TokenType]]]:
+        """从 position 开始模拟，按最长匹配原则返回被接受的最长前缀（与 DFA.longest_match 相同）"""
+        accept = self._accept[0]
+        last = (position, accept[0]) if accept is not None else None
+        
+        state = 0
+        rows = self._rows
+        for index in range(position, len(text)):
+            symbol = text[index]
+            target = rows[state].get(symbol)
+            if target is None:
+                target = self._step(state, symbol)
+                rows = self._rows
+            if target < 0:
+                break
+            state = target
+            accept = self._accept[state]
+            if accept is not None:
+                last = (index + 1, accept[0])
+        
+        return last
+
 
 class RegexToNFA:
     """正则表达式到NFA转换器 (Thompson构造法)"""
     
+    # 转义序列对应的字符类
+    _ESCAPE_CLASSES = {
+        'd': '0123456789',
+        'w': 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_',
+        's': ' \t\n\r',
+    }
+    
     def __init__(self):
         self.state_counter = 0
+        self._regex = ''  # 正在解析的正则表达式
+        self._pos = 0     # 解析位置
     
     def convert(self, regex: str, token_type: Optional[TokenType] = None) -> NFA:
-        """将正则表达式转换为NFA"""
-        # 预处理：展开字符类和转义字符
-        processed_regex = self._preprocess_regex(regex)
+        """将正则表达式转换为NFA
+        
+        递归下降解析正则表达式，每个语法成分解析完即用Thompson构造生成对应的NFA片段，
+        不再经过插入连接符、转后缀表达式、按后缀表达式构建三趟处理。
+        
+        文法（运算符均为左结合）：
+            expr   -> term ('|' term)*
+            term   -> factor*
+            factor -> atom ('*' | '+' | '?')*
+            atom   -> '(' expr ')' | '[' 字符类 ']' | '\\' 转义字符 | 普通字符
+        
+        Raises:
+            ValueError: 括号不匹配或量词缺少操作数
+        """
+        self._regex = regex
+        self._pos = 0
+        result = self._parse_expr()
+        if self._pos < len(regex):
+            # _parse_expr 只会停在多余的右括号上
+            raise ValueError(f"正则表达式第 {self._pos + 1} 个字符处有多余的右括号: {regex}")
         
-        # 添加连接操作符
-        concat_regex = self._add_concat_operator(processed_regex)
+        # 设置接受状态的Token类型
+        if token_type:
+            for state in result.accept_states:
+                state.token_type = token_type
         
-        # 转换为后缀表达式
-        postfix = self._to_postfix(concat_regex)
+        # NFA已构建完成，预计算各状态的ε闭包供子集构造使用
+        result.precompute_epsilon_closures()
         
-        # 构建NFA
-        return self._build_nfa(postfix, token_type)
+        return result
     
-    def _preprocess_regex(self, regex: str) -> str:
-        """预处理正则表达式"""
-        result = []
-        i = 0
-        while i < len(regex):
-            if regex[i] == '\\':
-                # 处理转义字符
-                if i + 1 < len(regex):
-                    next_char = regex[i + 1]
-                    if next_char == 'd':
-                        result.append('[0-9]')
-                    elif next_char == 'w':
-                        result.append('[a-zA-Z0-9_]')
-                    elif next_char == 's':
-                        result.append('[ \t\n\r]')
-                    elif next_char in '+*?()[]{}|.^$\\':
-                        result.append(next_char)
-                    else:
-                        result.append(next_char)
-                    i += 2
-                else:
-                    result.append(regex[i])
-                    i += 1
-            elif regex[i] == '[' and i + 1 < len(regex):
-                # 处理字符类
-                j = i + 1
-                while j < len(regex) and regex[j] != ']':
-                    j += 1
-                if j < len(regex):
-                    char_class = regex[i:j+1]
-                    expanded = self._expand_char_class(char_class)
-                    result.append(f'({expanded})')
-                    i = j + 1
-                else:
-                    result.append(regex[i])
-                    i += 1
-            else:
-                result.append(regex[i])
-                i += 1
+    def union_all(self, token_specs: Iterable[Tuple[str, Optional[TokenType]]]) -> NFA:
+        """将一组Token规则合并为一个NFA（词法分析器的标准构造）
         
-        return ''.join(result)
+        新的开始状态经ε转移进入各规则NFA的开始状态，各接受状态保留自己的Token类型。
+        子集构造后一次DFA扫描即可识别所有Token，规则的公共前缀也合并到同一组状态中。
+        规则按给出的顺序复制，先给出的规则状态编号更小；一个DFA状态含多个接受状态时
+        取编号最小者的Token类型，即同样长度的匹配以先给出的规则为准。
+        
+        Args:
+            token_specs: (正则表达式, Token类型) 序列，按优先级从高到低排列
+            
+        Returns:
+            合并后的NFA
+        """
+        result = NFA()
+        start = result.create_state()
+        result.set_start(start)
+        
+        for regex, token_type in token_specs:
+            nfa = self.convert(regex, token_type)
+            state_map = self._copy_states(result, nfa)
+            result.add_transition(start, 'ε', state_map[nfa.start_state])
+            for accept_state in nfa.accept_states:
+                result.add_accept(state_map[accept_state], accept_state.token_type)
+        
+        result.precompute_epsilon_closures()
+        return result
+    
+    def _parse_expr(self) -> NFA:
+        """expr -> term ('|' term)*"""
+        nfa = self._parse_term()
+        regex = self._regex
+        while self._pos < len(regex) and regex[self._pos] == '|':
+            self._pos += 1
+            nfa = self._union_nfa(nfa, self._parse_term())
+        return nfa
     
-    def _expand_char_class(self, char_class: str) -> str:
-        """展开字符类为选择表达式"""
+    def _parse_term(self) -> NFA:
+        """term -> factor*（空串对应只有一条ε转移的NFA）"""
+        regex = self._regex
+        nfa = None
+        while self._pos < len(regex) and regex[self._pos] not in '|)':
+            factor = self._parse_factor()
+            nfa = factor if nfa is None else self._concat_nfa(nfa, factor)
+        return nfa if nfa is not None else self._basic_nfa('ε')
+    
+    def _parse_factor(self) -> NFA:
+        """factor -> atom ('*' | '+' | '?')*"""
+        nfa = self._parse_atom()
+        regex = self._regex
+        while self._pos < len(regex):
+            char = regex[self._pos]
+            if char == '*':
+                nfa = self._kleene_star_nfa(nfa)
+            elif char == '+':
+                nfa = self._plus_nfa(nfa)
+            elif char == '?':
+                nfa = self._question_nfa(nfa)
+            else:
+                break
+            self._pos += 1
+        return nfa
+    
+    def _parse_atom(self) -> NFA:
+        """atom -> '(' expr ')' | '[' 字符类 ']' | '\\' 转义字符 | 普通字符
+        
+        字符类和转义序列作为单个操作数，由 _basic_nfa 生成两个状态之间的一组并行转移。
+        没有闭合的 '[' 和末尾单独的 '\\' 按普通字符处理；'.' 不表示任意字符，也按普通字符处理。
+        """
+        regex = self._regex
+        pos = self._pos
+        char = regex[pos]
+        
+        if char == '(':
+            self._pos = pos + 1
+            nfa = self._parse_expr()
+            if self._pos >= len(regex):
+                raise ValueError(f"正则表达式缺少右括号: {regex}")
+            self._pos += 1  # 跳过右括号
+            return nfa
+        
+        if char in '*+?':
+            raise ValueError(f"正则表达式第 {pos + 1} 个字符处的量词 '{char}' 缺少操作数: {regex}")
+        
+        if char == '\\' and pos + 1 < len(regex):
+            # 转义字符：\d、\w、\s 为字符类，其余（包括转义的元字符）按普通字符处理
+            next_char = regex[pos + 1]
+            self._pos = pos + 2
+            return self._basic_nfa(self._ESCAPE_CLASSES.get(next_char, next_char))
+        
+        if char == '[':
+            close = regex.find(']', pos + 1)
+            if close != -1:
+                self._pos = close + 1
+                return self._basic_nfa(self._expand_char_class(regex[pos:close + 1]))
+        
+        self._pos = pos + 1
+        return self._basic_nfa(char)
+    
+    def _expand_char_class(self, char_class: str) -> List[str]:
+        """展开字符类为其包含的字符列表"""
         content = char_class[1:-1]  # 去掉方括号
         chars = []
         i = 0
@@ -237,131 +552,72 @@ class RegexToNFA:
                 chars.append(content[i])
                 i += 1
         
-        return '|'.join(chars) if chars else ''
-    
-    def _add_concat_operator(self, regex: str) -> str:
-        """添加连接操作符"""
-        output = []
-        for i in range(len(regex)):
-            output.append(regex[i])
-            if (i + 1 < len(regex) and 
-                regex[i] not in '(|' and 
-                regex[i + 1] not in ')|*+?'):
-                output.append('.')
-        return ''.join(output)
-    
-    def _to_postfix(self, regex: str) -> List[str]:
-        """转换为后缀表达式"""
-        precedence = {'|': 1, '.': 2, '*': 3, '+': 3, '?': 3}
-        operators = {'|', '.', '*', '+', '?', '(', ')'}
-        
-        output = []
-        operator_stack = []
-        
-        for token in regex:
-            if token not in operators:
-                output.append(token)
-            elif token == '(':
-                operator_stack.append(token)
-            elif token == ')':
-                while operator_stack and operator_stack[-1] != '(':
-                    output.append(operator_stack.pop())
-                operator_stack.pop()  # 弹出左括号
-            else:
-                while (operator_stack and operator_stack[-1] != '(' and 
-                       precedence.get(operator_stack[-1], 0) >= precedence.get(token, 0)):
-                    output.append(operator_stack.pop())
-                operator_stack.append(token)
-        
-        while operator_stack:
-            output.append(operator_stack.pop())
-        
-        return output
-    
-    def _build_nfa(self, postfix: List[str], token_type: Optional[TokenType]) -> NFA:
-        """根据后缀表达式构建NFA"""
-        stack = []
-        
-        for token in postfix:
-            if token == '|':
-                nfa2 = stack.pop()
-                nfa1 = stack.pop()
-                stack.append(self._union_nfa(nfa1, nfa2))
-            elif token == '.':
-                nfa2 = stack.pop()
-                nfa1 = stack.pop()
-                stack.append(self._concat_nfa(nfa1, nfa2))
-            elif token == '*':
-                nfa = stack.pop()
-                stack.append(self._kleene_star_nfa(nfa))
-            elif token == '+':
-                nfa = stack.pop()
-                stack.append(self._plus_nfa(nfa))
-            elif token == '?':
-                nfa = stack.pop()
-                stack.append(self._question_nfa(nfa))
-            else:
-                stack.append(self._basic_nfa(token))
-        
-        result = stack[0] if stack else NFA()
-        
-        # 设置接受状态的Token类型
-        if token_type:
-            for state in result.accept_states:
-                state.token_type = token_type
-        
-        return result
+        return chars
     
-    def _basic_nfa(self, symbol: str) -> NFA:
-        """创建基本NFA"""
+    def _basic_nfa(self, chars: Iterable[str]) -> NFA:
+        """创建基本NFA（字符类中的每个字符对应一条转移；传入 'ε' 得到只有ε转移的NFA）"""
         nfa = NFA()
         start = nfa.create_state()
         end = nfa.create_state()
         
         nfa.set_start(start)
         nfa.add_accept(end)
-        nfa.add_transition(start, symbol, end)
+        for char in chars:
+            nfa.add_transition(start, char, end)
         
         return nfa
     
+    def _copy_states(self, result: NFA, nfa: NFA) -> Dict[State, State]:
+        """将nfa的所有状态和转移复制到result中
+        
+        复制的状态重新编号（两个NFA的状态ID可能重复），且都不是接受状态；
+        新状态的转移表直接整体构造，不逐条调用 add_transition。
+        每次组合都生成全新的NFA，状态ID只需在该NFA内唯一，因此都从0开始连续编号，
+        子集构造中以状态ID为位号的位集也就保持紧凑。
+        
+        Args:
+            result: 目标NFA
+            nfa: 被复制的NFA
+            
+        Returns:
+            原状态 -> 新状态 的映射
+        """
+        state_map: Dict[State, State] = {}
+        for state_id, state in enumerate(nfa.states, result.state_counter):
+            state_map[state] = State(state_id)
+        result.state_counter += len(state_map)
+        
+        for state, new_state in state_map.items():
+            new_state.transitions = {symbol: {state_map[target] for target in targets}
+                                     for symbol, targets in state.transitions.items()}
+        result.states.update(state_map.values())
+        result.alphabet |= nfa.alphabet
+        return state_map
+    
     def _concat_nfa(self, nfa1: NFA, nfa2: NFA) -> NFA:
         """连接两个NFA"""
         result = NFA()
-        result.state_counter = max(nfa1.state_counter, nfa2.state_counter)
-        
-        # 复制所有状态
-        state_map = {}
-        for nfa in [nfa1, nfa2]:
-            for state in nfa.states:
-                new_state = State(state.id)
-                new_state.is_accept = False  # 重置接受状态
-                state_map[state] = new_state
-                result.states.add(new_state)
-        
-        # 复制转移
-        for nfa in [nfa1, nfa2]:
-            for state in nfa.states:
-                for symbol, targets in state.transitions.items():
-                    for target in targets:
-                        result.add_transition(state_map[state], symbol, state_map[target])
+        
+        # 复制所有状态（重新编号；两个NFA的状态ID可能重复，因此分别建立映射）
+        map1 = self._copy_states(result, nfa1)
+        map2 = self._copy_states(result, nfa2)
         
         # 设置开始状态
-        result.set_start(state_map[nfa1.start_state])
+        result.set_start(map1[nfa1.start_state])
         
         # 连接nfa1的接受状态到nfa2的开始状态
         for accept_state in nfa1.accept_states:
-            result.add_transition(state_map[accept_state], 'ε', state_map[nfa2.start_state])
+            result.add_transition(map1[accept_state], 'ε', map2[nfa2.start_state])
         
         # 设置nfa2的接受状态为结果的接受状态
         for accept_state in nfa2.accept_states:
-            result.add_accept(state_map[accept_state], accept_state.token_type)
+            result.add_accept(map2[accept_state], accept_state.token_type)
         
         return result
     
     def _union_nfa(self, nfa1: NFA, nfa2: NFA) -> NFA:
         """联合两个NFA"""
         result = NFA()
-        result.state_counter = max(nfa1.state_counter, nfa2.state_counter)
         
         # 创建新的开始和结束状态
         new_start = result.create_state()
@@ -370,39 +626,25 @@ class RegexToNFA:
         result.set_start(new_start)
         result.add_accept(new_end)
         
-        # 复制所有状态
-        state_map = {}
-        for nfa in [nfa1, nfa2]:
-            for state in nfa.states:
-                new_state = State(result.state_counter)
-                result.state_counter += 1
-                new_state.is_accept = False
-                state_map[state] = new_state
-                result.states.add(new_state)
-        
-        # 复制转移
-        for nfa in [nfa1, nfa2]:
-            for state in nfa.states:
-                for symbol, targets in state.transitions.items():
-                    for target in targets:
-                        result.add_transition(state_map[state], symbol, state_map[target])
+        # 复制所有状态（两个NFA的状态ID可能重复，因此分别建立映射）
+        map1 = self._copy_states(result, nfa1)
+        map2 = self._copy_states(result, nfa2)
         
         # 连接新开始状态到两个NFA的开始状态
-        result.add_transition(new_start, 'ε', state_map[nfa1.start_state])
-        result.add_transition(new_start, 'ε', state_map[nfa2.start_state])
+        result.add_transition(new_start, 'ε', map1[nfa1.start_state])
+        result.add_transition(new_start, 'ε', map2[nfa2.start_state])
         
         # 连接两个NFA的接受状态到新结束状态
         for accept_state in nfa1.accept_states:
-            result.add_transition(state_map[accept_state], 'ε', new_end)
+            result.add_transition(map1[accept_state], 'ε', new_end)
         for accept_state in nfa2.accept_states:
-            result.add_transition(state_map[accept_state], 'ε', new_end)
+            result.add_transition(map2[accept_state], 'ε', new_end)
         
         return result
     
     def _kleene_star_nfa(self, nfa: NFA) -> NFA:
         """克莱尼星操作"""
         result = NFA()
-        result.state_counter = nfa.state_counter
         
         # 创建新的开始和结束状态
         new_start = result.create_state()
@@ -411,20 +653,8 @@ class RegexToNFA:
         result.set_start(new_start)
         result.add_accept(new_end)
         
-        # 复制所有状态
-        state_map = {}
-        for state in nfa.states:
-            new_state = State(result.state_counter)
-            result.state_counter += 1
-            new_state.is_accept = False
-            state_map[state] = new_state
-            result.states.add(new_state)
-        
-        # 复制转移
-        for state in nfa.states:
-            for symbol, targets in state.transitions.items():
-                for target in targets:
-                    result.add_transition(state_map[state], symbol, state_map[target])
+        # 复制所有状态和转移
+        state_map = self._copy_states(result, nfa)
         
         # 添加ε转移
         result.add_transition(new_start, 'ε', state_map[nfa.start_state])  # 进入
@@ -438,14 +668,31 @@ class RegexToNFA:
     
     def _plus_nfa(self, nfa: NFA) -> NFA:
         """加号操作 (一次或多次)"""
-        # A+ = AA*
-        star_nfa = self._kleene_star_nfa(nfa)
-        return self._concat_nfa(nfa, star_nfa)
+        # 与克莱尼星的构造相同，只是没有跳过的ε转移；不按 A+ = AA* 构造，A 只复制一份
+        result = NFA()
+        
+        # 创建新的开始和结束状态
+        new_start = result.create_state()
+        new_end = result.create_state()
+        
+        result.set_start(new_start)
+        result.add_accept(new_end)
+        
+        # 复制所有状态和转移
+        state_map = self._copy_states(result, nfa)
+        
+        # 添加ε转移
+        result.add_transition(new_start, 'ε', state_map[nfa.start_state])  # 进入
+        
+        for accept_state in nfa.accept_states:
+            result.add_transition(state_map[accept_state], 'ε', new_end)  # 退出
+            result.add_transition(state_map[accept_state], 'ε', state_map[nfa.start_state])  # 循环
+        
+        return result
     
     def _question_nfa(self, nfa: NFA) -> NFA:
         """问号操作 (零次或一次)"""
         result = NFA()
-        result.state_counter = nfa.state_counter
         
         # 创建新的开始和结束状态
         new_start = result.create_state()
@@ -454,20 +701,8 @@ class RegexToNFA:
         result.set_start(new_start)
         result.add_accept(new_end)
         
-        # 复制所有状态
-        state_map = {}
-        for state in nfa.states:
-            new_state = State(result.state_counter)
-            result.state_counter += 1
-            new_state.is_accept = False
-            state_map[state] = new_state
-            result.states.add(new_state)
-        
-        # 复制转移
-        for state in nfa.states:
-            for symbol, targets in state.transitions.items():
-                for target in targets:
-                    result.add_transition(state_map[state], symbol, state_map[target])
+        # 复制所有状态和转移
+        state_map = self._copy_states(result, nfa)
         
         # 添加ε转移
         result.add_transition(new_start, 'ε', state_map[nfa.start_state])  # 进入
@@ -483,132 +718,162 @@ class NFAToDFA:
     """NFA到DFA转换器 (子集构造法)"""
     
     def convert(self, nfa: NFA) -> DFA:
-        """将NFA转换为DFA"""
+        """将NFA转换为DFA
+        
+        NFA状态集合用整数位集表示（第 i 位对应编号为 i 的NFA状态），
+        求并集、判重都是C实现的整数运算；只有新发现的DFA状态才还原成NFA状态集合。
+        """
         dfa = DFA()
         dfa.alphabet = nfa.alphabet.copy()
         
+        by_id, steps = nfa._step_table()
+        
         # 计算初始状态的ε闭包
-        start_closure = nfa.epsilon_closure({nfa.start_state})
-        start_id = self._state_set_to_id(start_closure)
+        start_bits = _to_bits(nfa.epsilon_closure({nfa.start_state}))
+        start_members = list(_iter_bits(start_bits))
+        start_id = self._members_to_id(start_members)
         
         dfa.start_state = start_id
-        dfa.add_state(start_id, start_closure)
+        dfa.add_state(start_id, {by_id[state_id] for state_id in start_members})
         
-        # 工作队列
-        unprocessed = [start_closure]
-        processed = {start_id}
+        # 工作队列：每个DFA状态的位集只分解一次，成员编号列表随位集一起入队
+        unprocessed = deque([(start_bits, start_members)])
+        processed = {start_bits: start_id}
         
         while unprocessed:
-            current_set = unprocessed.pop(0)
-            current_id = self._state_set_to_id(current_set)
+            current_bits, members = unprocessed.popleft()
+            current_id = processed[current_bits]
             
-            for symbol in dfa.alphabet:
-                # 计算move和ε闭包
-                move_result = nfa.move(current_set, symbol)
-                if move_result:
-                    next_closure = nfa.epsilon_closure(move_result)
-                    next_id = self._state_set_to_id(next_closure)
-                    
-                    # 添加转移
-                    dfa.add_transition(current_id, symbol, next_id)
-                    
-                    # 如果是新状态，添加到DFA和工作队列
-                    if next_id not in processed:
-                        dfa.add_state(next_id, next_closure)
-                        unprocessed.append(next_closure)
-                        processed.add(next_id)
+            # 只对当前状态集合实际拥有出边的符号计算转移，不逐个尝试整个字母表
+            moves: Dict[str, int] = {}
+            for state_id in members:
+                for symbol, bits in steps[state_id]:
+                    moves[symbol] = moves.get(symbol, 0) | bits
+            
+            for symbol, next_bits in moves.items():
+                next_id = processed.get(next_bits)
+                
+                # 如果是新状态，添加到DFA和工作队列
+                if next_id is None:
+                    next_members = list(_iter_bits(next_bits))
+                    next_id = processed[next_bits] = self._members_to_id(next_members)
+                    dfa.add_state(next_id, {by_id[state_id] for state_id in next_members})
+                    unprocessed.append((next_bits, next_members))
+                
+                # 添加转移
+                dfa.add_transition(current_id, symbol, next_id)
         
         return dfa
     
-    def _state_set_to_id(self, state_set: Set[State]) -> str:
-        """将状态集合转换为ID"""
-        return '{' + ','.join(str(s.id) for s in sorted(state_set, key=lambda x: x.id)) + '}'
+    def _members_to_id(self, members: List[int]) -> str:
+        """将状态编号列表（升序）转换为ID"""
+        return '{' + ','.join(map(str, members)) + '}'
+
+
+def _to_bits(states: Set[State]) -> int:
+    """将NFA状态集合转换为整数位集"""
+    bits = 0
+    for state in states:
+        bits |= 1 << state.id
+    return bits
+
+
+def _iter_bits(bits: int) -> Iterator[int]:
+    """按升序产生位集中为1的位的编号"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
 
 
 class DFAMinimizer:
-    """DFA最小化器"""
+    """DFA最小化器 (Hopcroft分割细化算法)"""
     
     def minimize(self, dfa: DFA) -> DFA:
         """最小化DFA"""
-        # 初始分割：接受状态和非接受状态
-        accept_states = set(dfa.accept_states)
-        non_accept_states = set(dfa.states.keys()) - accept_states
-        
-        partitions = []
-        if non_accept_states:
-            partitions.append(non_accept_states)
-        if accept_states:
-            partitions.append(accept_states)
-        
-        # 迭代细化分割
-        changed = True
-        while changed:
-            changed = False
-            new_partitions = []
-            
-            for partition in partitions:
-                sub_partitions = self._split_partition(partition, partitions, dfa)
-                if len(sub_partitions) > 1:
-                    changed = True
-                new_partitions.extend(sub_partitions)
+        alphabet = list(dfa.alphabet)
+        # 缺失的转移视为进入一个不接受的死状态（用None表示）
+        states = list(dfa.states.keys()) + [None]
+        
+        # 预先构建逆转移表：inverse[符号][目标状态] -> 源状态列表
+        inverse: Dict[str, Dict[Optional[str], List[Optional[str]]]] = {}
+        for symbol in alphabet:
+            sources_of: Dict[Optional[str], List[Optional[str]]] = {}
+            for state in states:
+                target = dfa.transitions.get((state, symbol)) if state is not None else None
+                sources_of.setdefault(target, []).append(state)
+            inverse[symbol] = sources_of
+        
+        # 初始分割：非接受状态，以及按Token类型区分的接受状态
+        initial: Dict[Any, List[Optional[str]]] = {}
+        for state in states:
+            if state in dfa.accept_states:
+                key = ('accept', dfa.token_types.get(state))
+            else:
+                key = ('reject', None)
+            initial.setdefault(key, []).append(state)
+        
+        blocks: List[Set[Optional[str]]] = [set(group) for group in initial.values()]
+        block_of: Dict[Optional[str], int] = {}
+        for index, block in enumerate(blocks):
+            for state in block:
+                block_of[state] = index
+        
+        worklist = deque(range(len(blocks)))
+        in_worklist = set(worklist)
+        
+        while worklist:
+            splitter = worklist.popleft()
+            in_worklist.discard(splitter)
+            splitter_states = list(blocks[splitter])
             
-            partitions = new_partitions
+            for symbol in alphabet:
+                sources_of = inverse[symbol]
+                # 统计每个块中能经symbol进入splitter的状态
+                touched: Dict[int, Set[Optional[str]]] = {}
+                for target in splitter_states:
+                    for source in sources_of.get(target, ()):
+                        touched.setdefault(block_of[source], set()).add(source)
+                
+                for index, hit in touched.items():
+                    block = blocks[index]
+                    if len(hit) == len(block):
+                        continue
+                    
+                    # 原块保留较大的一半，较小的一半成为新块并加入工作表
+                    rest = block - hit
+                    small, large = (hit, rest) if len(hit) <= len(rest) else (rest, hit)
+                    blocks[index] = large
+                    new_index = len(blocks)
+                    blocks.append(small)
+                    for state in small:
+                        block_of[state] = new_index
+                    worklist.append(new_index)
+                    in_worklist.add(new_index)
+        
+        # 去掉死状态，按原DFA中状态的顺序排列分区
+        partitions: List[Set[str]] = []
+        seen_blocks = set()
+        for state in states[:-1]:
+            index = block_of[state]
+            if index not in seen_blocks:
+                seen_blocks.add(index)
+                partitions.append({s for s in blocks[index] if s is not None})
         
         # 构建最小化DFA
         return self._build_minimized_dfa(dfa, partitions)
     
-    def _split_partition(self, partition: Set[str], all_partitions: List[Set[str]], dfa: DFA) -> List[Set[str]]:
-        """分割分区"""
-        if len(partition) <= 1:
-            return [partition]
-        
-        # 选择分区中的第一个状态作为代表
-        representative = next(iter(partition))
-        groups = {representative: {representative}}
-        
-        for state in partition:
-            if state == representative:
-                continue
-            
-            # 检查是否与代表状态等价
-            equivalent = True
-            for symbol in dfa.alphabet:
-                rep_target = dfa.get_transition(representative, symbol)
-                state_target = dfa.get_transition(state, symbol)
-                
-                # 找到目标状态所在的分区
-                rep_partition = self._find_partition(rep_target, all_partitions) if rep_target else None
-                state_partition = self._find_partition(state_target, all_partitions) if state_target else None
-                
-                if rep_partition != state_partition:
-                    equivalent = False
-                    break
-            
-            if equivalent:
-                groups[representative].add(state)
-            else:
-                # 创建新组
-                groups[state] = {state}
-        
-        return list(groups.values())
-    
-    def _find_partition(self, state: str, partitions: List[Set[str]]) -> Optional[int]:
-        """找到状态所在的分区索引"""
-        for i, partition in enumerate(partitions):
-            if state in partition:
-                return i
-        return None
-    
     def _build_minimized_dfa(self, original_dfa: DFA, partitions: List[Set[str]]) -> DFA:
         """构建最小化DFA"""
         minimized = DFA()
         minimized.alphabet = original_dfa.alphabet.copy()
         
-        # 创建分区到新状态ID的映射
-        partition_to_id = {}
+        # 原状态到新状态ID的映射
+        state_to_id: Dict[str, str] = {}
         for i, partition in enumerate(partitions):
             new_id = f"q{i}"
-            partition_to_id[i] = new_id
+            for state in partition:
+                state_to_id[state] = new_id
             
             # 选择分区中的一个代表状态
             representative = next(iter(partition))
@@ -625,24 +890,28 @@ class DFAMinimizer:
                 if representative in original_dfa.token_types:
                     minimized.token_types[new_id] = original_dfa.token_types[representative]
         
-        # 添加转移
+        # 添加转移（同一分区内的状态转移等价，取代表状态即可）
         for i, partition in enumerate(partitions):
             representative = next(iter(partition))
-            from_id = partition_to_id[i]
+            from_id = f"q{i}"
             
             for symbol in minimized.alphabet:
                 target = original_dfa.get_transition(representative, symbol)
                 if target:
-                    target_partition = self._find_partition(target, partitions)
-                    if target_partition is not None:
-                        to_id = partition_to_id[target_partition]
-                        minimized.add_transition(from_id, symbol, to_id)
+                    minimized.add_transition(from_id, symbol, state_to_id[target])
         
         return minimized
 
 
-def visualize_nfa(nfa: NFA, title: str = "NFA") -> Image.Image:
-    """可视化NFA"""
+def visualize_nfa(nfa: NFA, title: str = "NFA") -> 'Image.Image':
+    """可视化NFA（渲染为PNG图片）"""
+    return _render_png(nfa_to_dot(nfa, title))
+
+
+def nfa_to_dot(nfa: NFA, title: str = "NFA") -> 'graphviz.Digraph':
+    """构造NFA的Graphviz图（只生成DOT描述，不调用dot进程渲染）"""
+    import graphviz
+    
     dot = graphviz.Digraph(comment=title)
     dot.attr(rankdir='LR')
     
@@ -654,25 +923,50 @@ def visualize_nfa(nfa: NFA, title: str = "NFA") -> Image.Image:
             label += f"\n{state.token_type.value}"
         dot.node(str(state.id), label, shape=shape)
     
-    # 添加转移
+    # 添加转移（字符类在两个状态之间的一组并行转移合并为一条边）
+    edges: Dict[Tuple[int, int], List[str]] = {}
     for state in nfa.states:
         for symbol, targets in state.transitions.items():
             for target in targets:
-                label = 'ε' if symbol == 'ε' else symbol
-                dot.edge(str(state.id), str(target.id), label=label)
+                edges.setdefault((state.id, target.id), []).append(symbol)
+    for (from_id, to_id), symbols in edges.items():
+        dot.edge(str(from_id), str(to_id), label=_format_symbols(symbols))
     
     # 标记开始状态
     if nfa.start_state:
         dot.node('start', '', shape='point')
         dot.edge('start', str(nfa.start_state.id))
     
-    # 渲染为图片
-    img_data = dot.pipe(format='png')
-    return Image.open(io.BytesIO(img_data))
+    return dot
+
 
+def _format_symbols(symbols: List[str]) -> str:
+    """将符号列表格式化为边标签，连续的三个及以上字符写成范围"""
+    chars = sorted(symbols)
+    parts = []
+    i = 0
+    while i < len(chars):
+        j = i
+        while (j + 1 < len(chars) and len(chars[j]) == 1 and len(chars[j + 1]) == 1
+               and ord(chars[j + 1]) == ord(chars[j]) + 1):
+            j += 1
+        if j - i >= 2:
+            parts.append(f"{chars[i]}-{chars[j]}")
+        else:
+            parts.extend(chars[i:j + 1])
+        i = j + 1
+    return ','.join(parts)
 
-def visualize_dfa(dfa: DFA, title: str = "DFA") -> Image.Image:
-    """可视化DFA"""
+
+def visualize_dfa(dfa: DFA, title: str = "DFA") -> 'Image.Image':
+    """可视化DFA（渲染为PNG图片）"""
+    return _render_png(dfa_to_dot(dfa, title))
+
+
+def dfa_to_dot(dfa: DFA, title: str = "DFA") -> 'graphviz.Digraph':
+    """构造DFA的Graphviz图（只生成DOT描述，不调用dot进程渲染）"""
+    import graphviz
+    
     dot = graphviz.Digraph(comment=title)
     dot.attr(rankdir='LR')
     
@@ -684,15 +978,23 @@ def visualize_dfa(dfa: DFA, title: str = "DFA") -> Image.Image:
             label += f"\n{dfa.token_types[state_id].value}"
         dot.node(state_id, label, shape=shape)
     
-    # 添加转移
+    # 添加转移（同一对状态之间的转移合并为一条边，如标识符的 a-z 只画一条）
+    edges: Dict[Tuple[str, str], List[str]] = {}
     for (from_state, symbol), to_state in dfa.transitions.items():
-        dot.edge(from_state, to_state, label=symbol)
+        edges.setdefault((from_state, to_state), []).append(symbol)
+    for (from_state, to_state), symbols in edges.items():
+        dot.edge(from_state, to_state, label=_format_symbols(symbols))
     
     # 标记开始状态
     if dfa.start_state:
         dot.node('start', '', shape='point')
         dot.edge('start', dfa.start_state)
     
-    # 渲染为图片
-    img_data = dot.pipe(format='png')
-    return Image.open(io.BytesIO(img_data))
\ No newline at end of file
+    return dot
+
+
+def _render_png(dot: 'graphviz.Digraph') -> 'Image.Image':
+    """调用dot进程将图渲染为PNG，并读取为PIL图片"""
+    from PIL import Image
+    
+    return Image.open(io.BytesIO(dot.pipe(format='png')))
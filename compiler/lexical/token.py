@@ -8,8 +8,8 @@ Token定义模块
 """
 
 import enum
-from dataclasses import dataclass
-from typing import Optional, Any, Tuple
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Tuple
 
 
 class TokenType(enum.Enum):
@@ -18,6 +18,10 @@ class TokenType(enum.Enum):
     包含常见编程语言的所有Token类型，支持Pascal、C等语言。
     """
     
+    # 枚举成员是单例，相等比较本来就是对象身份比较；Enum 默认的 __hash__ 是Python层函数
+    # （对成员名求哈希），改用C实现的身份哈希后，集合/字典按Token类型查找快约3倍
+    __hash__ = object.__hash__
+    
     # === Pascal关键字 ===
     PROGRAM = "PROGRAM"
     VAR = "VAR"
@@ -172,12 +176,135 @@ class TokenType(enum.Enum):
     UNKNOWN = "UNKNOWN"              # 未知Token
 
 
-@dataclass
+# 各语言的关键字表（小写拼写 -> Token类型），分析器创建时复制使用，不再每次重新构造
+# 拼写都是源码中的标识符形式的字符串常量，编译时已自动驻留
+PASCAL_KEYWORDS: Dict[str, TokenType] = {
+    'program': TokenType.PROGRAM,
+    'var': TokenType.VAR,
+    'const': TokenType.CONST,
+    'type': TokenType.TYPE,
+    'function': TokenType.FUNCTION,
+    'procedure': TokenType.PROCEDURE,
+    'begin': TokenType.BEGIN,
+    'end': TokenType.END,
+    'if': TokenType.IF,
+    'then': TokenType.THEN,
+    'else': TokenType.ELSE,
+    'while': TokenType.WHILE,
+    'do': TokenType.DO,
+    'for': TokenType.FOR,
+    'to': TokenType.TO,
+    'downto': TokenType.DOWNTO,
+    'repeat': TokenType.REPEAT,
+    'until': TokenType.UNTIL,
+    'case': TokenType.CASE,
+    'of': TokenType.OF,
+    'integer': TokenType.INTEGER,
+    'real': TokenType.REAL,
+    'boolean': TokenType.BOOLEAN,
+    'char': TokenType.CHAR,
+    'string': TokenType.STRING,
+    'mod': TokenType.MOD,
+    'div': TokenType.DIV,
+    'and': TokenType.AND,
+    'or': TokenType.OR,
+    'not': TokenType.NOT,
+}
+
+C_KEYWORDS: Dict[str, TokenType] = {
+    'auto': TokenType.AUTO,
+    'break': TokenType.BREAK,
+    'case': TokenType.CASE,
+    'char': TokenType.CHAR,
+    'const': TokenType.CONST,
+    'continue': TokenType.CONTINUE,
+    'default': TokenType.DEFAULT,
+    'do': TokenType.DO,
+    'double': TokenType.DOUBLE,
+    'else': TokenType.ELSE,
+    'enum': TokenType.ENUM,
+    'extern': TokenType.EXTERN,
+    'float': TokenType.FLOAT,
+    'for': TokenType.FOR,
+    'goto': TokenType.GOTO,
+    'if': TokenType.IF,
+    'int': TokenType.INT,
+    'long': TokenType.LONG,
+    'register': TokenType.REGISTER,
+    'return': TokenType.RETURN,
+    'short': TokenType.SHORT,
+    'signed': TokenType.SIGNED,
+    'sizeof': TokenType.SIZEOF,
+    'static': TokenType.STATIC,
+    'struct': TokenType.STRUCT,
+    'switch': TokenType.SWITCH,
+    'typedef': TokenType.TYPEDEF,
+    'union': TokenType.UNION,
+    'unsigned': TokenType.UNSIGNED,
+    'void': TokenType.VOID,
+    'volatile': TokenType.VOLATILE,
+    'while': TokenType.WHILE,
+}
+
+
+# Token分类使用的类型集合（模块级常量，不在每次判断时重新构造）
+_KEYWORD_TYPES = frozenset({
+    # Pascal关键字
+    TokenType.PROGRAM, TokenType.VAR, TokenType.CONST, TokenType.PROCEDURE,
+    TokenType.FUNCTION, TokenType.BEGIN, TokenType.END, TokenType.IF,
+    TokenType.THEN, TokenType.ELSE, TokenType.WHILE, TokenType.DO,
+    TokenType.FOR, TokenType.TO, TokenType.REPEAT, TokenType.UNTIL,
+    TokenType.CASE, TokenType.OF, TokenType.MOD, TokenType.DIV,
+    TokenType.AND, TokenType.OR, TokenType.NOT,
+
+    # C关键字
+    TokenType.AUTO, TokenType.BREAK, TokenType.CONTINUE, TokenType.DEFAULT,
+    TokenType.ENUM, TokenType.EXTERN, TokenType.GOTO, TokenType.REGISTER,
+    TokenType.RETURN, TokenType.SIZEOF, TokenType.STATIC, TokenType.STRUCT,
+    TokenType.SWITCH, TokenType.TYPEDEF, TokenType.UNION, TokenType.VOLATILE,
+
+    # 数据类型
+    TokenType.INTEGER, TokenType.REAL, TokenType.BOOLEAN, TokenType.CHAR,
+    TokenType.STRING, TokenType.INT, TokenType.FLOAT, TokenType.DOUBLE,
+    TokenType.VOID, TokenType.SHORT, TokenType.LONG, TokenType.SIGNED,
+    TokenType.UNSIGNED
+})
+
+_OPERATOR_TYPES = frozenset({
+    TokenType.PLUS, TokenType.MINUS, TokenType.MULTIPLY, TokenType.DIVIDE,
+    TokenType.MODULO, TokenType.MOD, TokenType.DIV, TokenType.ASSIGN,
+    TokenType.PLUS_ASSIGN, TokenType.MINUS_ASSIGN, TokenType.MUL_ASSIGN,
+    TokenType.DIV_ASSIGN, TokenType.MOD_ASSIGN, TokenType.EQUAL,
+    TokenType.NOT_EQUAL, TokenType.LESS, TokenType.LESS_EQUAL,
+    TokenType.GREATER, TokenType.GREATER_EQUAL, TokenType.AND, TokenType.OR,
+    TokenType.NOT, TokenType.BITWISE_AND, TokenType.BITWISE_OR,
+    TokenType.BITWISE_XOR, TokenType.BITWISE_NOT, TokenType.LEFT_SHIFT,
+    TokenType.RIGHT_SHIFT, TokenType.INCREMENT, TokenType.DECREMENT,
+    TokenType.POINTER, TokenType.ADDRESS, TokenType.ARROW
+})
+
+_LITERAL_TYPES = frozenset({
+    TokenType.NUMBER, TokenType.INTEGER_LITERAL, TokenType.FLOAT_LITERAL,
+    TokenType.STRING_LITERAL, TokenType.CHAR_LITERAL
+})
+
+_DELIMITER_TYPES = frozenset({
+    TokenType.SEMICOLON, TokenType.COMMA, TokenType.DOT, TokenType.COLON,
+    TokenType.QUESTION, TokenType.LPAREN, TokenType.RPAREN,
+    TokenType.LBRACKET, TokenType.RBRACKET, TokenType.LBRACE, TokenType.RBRACE
+})
+
+_WHITESPACE_TYPES = frozenset({TokenType.WHITESPACE, TokenType.NEWLINE})
+
+
 class Token:
     """Token数据结构
     
     表示词法分析过程中识别出的一个Token。
     
+    每个被分析的Token都会创建一个实例，因此使用 __slots__，不为实例分配 __dict__；
+    length 和 metadata 多数Token用不到，未显式给出时在首次读取时才计算/创建。
+    
     Attributes:
         type: Token类型
         value: Token的字符串值
@@ -186,90 +313,79 @@ class Token:
         length: Token长度
         metadata: 附加元数据
     """
-    type: TokenType
-    value: str
-    line: int
-    column: int
-    length: Optional[int] = None
-    metadata: Optional[dict] = None
-    
-    def __post_init__(self):
-        """初始化后处理"""
-        if self.length is None:
-            self.length = len(self.value)
-        if self.metadata is None:
-            self.metadata = {}
     
+    __slots__ = ('type', 'value', 'line', 'column', '_length', '_metadata')
+    
+    def __init__(self, type: TokenType, value: str, line: int, column: int,
+                 length: Optional[int] = None, metadata: Optional[dict] = None):
+        self.type = type
+        self.value = value
+        self.line = line
+        self.column = column
+        self._length = length
+        self._metadata = metadata
+    
+    @property
+    def length(self) -> int:
+        """Token长度（未显式给出时为值的长度）"""
+        if self._length is None:
+            return len(self.value)
+        return self._length
+    
+    @length.setter
+    def length(self, length: Optional[int]):
+        self._length = length
+    
+    @property
+    def metadata(self) -> dict:
+        """附加元数据（首次读取时创建）"""
+        if self._metadata is None:
+            self._metadata = {}
+        return self._metadata
+    
+    @metadata.setter
+    def metadata(self, metadata: Optional[dict]):
+        self._metadata = metadata
+    
+    def __eq__(self, other: Any) -> bool:
+        """按全部字段比较（与原先数据类生成的比较相同）"""
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return ((self.type, self.value, self.line, self.column, self.length, self._metadata or {}) ==
+                (other.type, other.value, other.line, other.column, other.length, other._metadata or {}))
+    
+    # 可变对象按值比较，不可哈希
+    __hash__ = None
+    
+    # 以下两个方法读类型的 _value_（即 type.value 的值），不经过 Enum.value 描述符
     def __str__(self) -> str:
         """字符串表示"""
-        return f"Token({self.type.value}, '{self.value}', {self.line}:{self.column})"
+        return f"Token({self.type._value_}, '{self.value}', {self.line}:{self.column})"
     
     def __repr__(self) -> str:
         """详细字符串表示"""
-        return (f"Token(type={self.type.value}, value='{self.value}', "
+        return (f"Token(type={self.type._value_}, value='{self.value}', "
                 f"line={self.line}, column={self.column}, length={self.length})") 
     
     def is_keyword(self) -> bool:
         """判断是否为关键字"""
-        keywords = {
-            # Pascal关键字
-            TokenType.PROGRAM, TokenType.VAR, TokenType.CONST, TokenType.PROCEDURE,
-            TokenType.FUNCTION, TokenType.BEGIN, TokenType.END, TokenType.IF,
-            TokenType.THEN, TokenType.ELSE, TokenType.WHILE, TokenType.DO,
-            TokenType.FOR, TokenType.TO, TokenType.REPEAT, TokenType.UNTIL,
-            TokenType.CASE, TokenType.OF, TokenType.MOD, TokenType.DIV,
-            TokenType.AND, TokenType.OR, TokenType.NOT,
-            
-            # C关键字
-            TokenType.AUTO, TokenType.BREAK, TokenType.CONTINUE, TokenType.DEFAULT,
-            TokenType.ENUM, TokenType.EXTERN, TokenType.GOTO, TokenType.REGISTER,
-            TokenType.RETURN, TokenType.SIZEOF, TokenType.STATIC, TokenType.STRUCT,
-            TokenType.SWITCH, TokenType.TYPEDEF, TokenType.UNION, TokenType.VOLATILE,
-            
-            # 数据类型
-            TokenType.INTEGER, TokenType.REAL, TokenType.BOOLEAN, TokenType.CHAR,
-            TokenType.STRING, TokenType.INT, TokenType.FLOAT, TokenType.DOUBLE,
-            TokenType.VOID, TokenType.SHORT, TokenType.LONG, TokenType.SIGNED,
-            TokenType.UNSIGNED
-        }
-        return self.type in keywords
+        return self.type in _KEYWORD_TYPES
     
     def is_operator(self) -> bool:
         """判断是否为运算符"""
-        operators = {
-            TokenType.PLUS, TokenType.MINUS, TokenType.MULTIPLY, TokenType.DIVIDE,
-            TokenType.MODULO, TokenType.MOD, TokenType.DIV, TokenType.ASSIGN,
-            TokenType.PLUS_ASSIGN, TokenType.MINUS_ASSIGN, TokenType.MUL_ASSIGN,
-            TokenType.DIV_ASSIGN, TokenType.MOD_ASSIGN, TokenType.EQUAL,
-            TokenType.NOT_EQUAL, TokenType.LESS, TokenType.LESS_EQUAL,
-            TokenType.GREATER, TokenType.GREATER_EQUAL, TokenType.AND, TokenType.OR,
-            TokenType.NOT, TokenType.BITWISE_AND, TokenType.BITWISE_OR,
-            TokenType.BITWISE_XOR, TokenType.BITWISE_NOT, TokenType.LEFT_SHIFT,
-            TokenType.RIGHT_SHIFT, TokenType.INCREMENT, TokenType.DECREMENT,
-            TokenType.POINTER, TokenType.ADDRESS, TokenType.ARROW
-        }
-        return self.type in operators
+        return self.type in _OPERATOR_TYPES
     
     def is_literal(self) -> bool:
         """判断是否为字面量"""
-        literals = {
-            TokenType.NUMBER, TokenType.INTEGER_LITERAL, TokenType.FLOAT_LITERAL,
-            TokenType.STRING_LITERAL, TokenType.CHAR_LITERAL
-        }
-        return self.type in literals
+        return self.type in _LITERAL_TYPES
     
     def is_delimiter(self) -> bool:
         """判断是否为分隔符"""
-        delimiters = {
-            TokenType.SEMICOLON, TokenType.COMMA, TokenType.DOT, TokenType.COLON,
-            TokenType.QUESTION, TokenType.LPAREN, TokenType.RPAREN,
-            TokenType.LBRACKET, TokenType.RBRACKET, TokenType.LBRACE, TokenType.RBRACE
-        }
-        return self.type in delimiters
+        return self.type in _DELIMITER_TYPES
     
     def is_whitespace(self) -> bool:
         """判断是否为空白字符"""
-        return self.type in {TokenType.WHITESPACE, TokenType.NEWLINE}
+        return self.type in _WHITESPACE_TYPES
     
     def get_end_position(self) -> Tuple[int, int]:
         """获取Token结束位置"""
@@ -283,6 +399,51 @@ class Token:
         return end_line, end_column
 
 
+class TokenStream:
+    """列式存储的Token序列
+    
+    类型、值、行号、列号分别存放在各自的列中（行号和列号使用 array('i')），
+    不为每个Token创建对象；按下标访问或迭代时才临时构造 Token。
+    适合只需要统计或按列遍历的大文件分析。
+    
+    Attributes:
+        types: Token类型列表
+        values: Token值列表
+        lines: 行号数组
+        columns: 列号数组
+    """
+    
+    __slots__ = ('types', 'values', 'lines', 'columns')
+    
+    def __init__(self, types: List[TokenType], values: List[str],
+                 lines: 'array[int]', columns: 'array[int]'):
+        self.types = types
+        self.values = values
+        self.lines = lines
+        self.columns = columns
+    
+    @classmethod
+    def from_tuples(cls, infos: Iterable[Tuple[TokenType, str, int, int]]) -> 'TokenStream':
+        """由 (类型, 值, 行号, 列号) 序列构造"""
+        columns = tuple(zip(*infos))
+        if not columns:
+            return cls([], [], array('i'), array('i'))
+        return cls(list(columns[0]), list(columns[1]), array('i', columns[2]), array('i', columns[3]))
+    
+    def __len__(self) -> int:
+        return len(self.types)
+    
+    def __getitem__(self, index: int) -> Token:
+        return Token(self.types[index], self.values[index], self.lines[index], self.columns[index])
+    
+    def __iter__(self) -> Iterator[Token]:
+        return map(Token, self.types, self.values, self.lines, self.columns)
+    
+    def to_tokens(self) -> List[Token]:
+        """转换为Token对象列表"""
+        return list(self)
+
+
 class TokenCategory(enum.Enum):
     """Token分类
     
@@ -299,33 +460,39 @@ class TokenCategory(enum.Enum):
     ERROR = "ERROR"
 
 
-def get_token_category(token_type: TokenType) -> TokenCategory:
-    """获取Token的分类
-    
-    Args:
-        token_type: Token类型
-        
-    Returns:
-        Token分类
-    """
-    # 创建一个临时Token来使用其方法
-    temp_token = Token(token_type, "", 0, 0)
-    
-    if temp_token.is_keyword():
+def _classify(token_type: TokenType) -> TokenCategory:
+    """按类型集合确定Token的分类（检查顺序即分类的优先级）"""
+    if token_type in _KEYWORD_TYPES:
         return TokenCategory.KEYWORD
     elif token_type == TokenType.IDENTIFIER:
         return TokenCategory.IDENTIFIER
-    elif temp_token.is_literal():
+    elif token_type in _LITERAL_TYPES:
         return TokenCategory.LITERAL
-    elif temp_token.is_operator():
+    elif token_type in _OPERATOR_TYPES:
         return TokenCategory.OPERATOR
-    elif temp_token.is_delimiter():
+    elif token_type in _DELIMITER_TYPES:
         return TokenCategory.DELIMITER
-    elif temp_token.is_whitespace():
+    elif token_type in _WHITESPACE_TYPES:
         return TokenCategory.WHITESPACE
     elif token_type == TokenType.COMMENT:
         return TokenCategory.COMMENT
     elif token_type in {TokenType.EOF, TokenType.HASH}:
         return TokenCategory.SPECIAL
     else:
-        return TokenCategory.ERROR
\ No newline at end of file
+        return TokenCategory.ERROR
+
+
+# Token类型 -> 分类（类型是有限的枚举，导入时一次算好）
+_CATEGORIES = {token_type: _classify(token_type) for token_type in TokenType}
+
+
+def get_token_category(token_type: TokenType) -> TokenCategory:
+    """获取Token的分类
+    
+    Args:
+        token_type: Token类型
+        
+    Returns:
+        Token分类（不是已知的Token类型时为 TokenCategory.ERROR）
+    """
+    return _CATEGORIES.get(token_type, TokenCategory.ERROR)
@@ -1,20 +1,40 @@
+from .semantic_error import SemanticException
+
+
+def _act_add(attrs, symtab):  # E → E + T
+    return attrs[0] + attrs[2]
+
+
+def _act_pass(attrs, symtab):  # E → T
+    return attrs[0]
+
+
+def _act_int(attrs, symtab):  # T → int
+    return int(attrs[0])
+
+
+def _act_declare(attrs, symtab):  # D → int id
+    var_name = attrs[1]
+    symtab.declare(var_name, "int")
+    return None
+
+
+def _act_assign(attrs, symtab):  # S → id = E
+    var_name = attrs[0]
+    if not symtab.lookup(var_name):
+        raise SemanticException(f"变量未定义: {var_name}")
+    # 可扩展：类型检查
+    return None
+
+
+# 产生式编号 -> 语义动作（下标即编号，0号为增广产生式，没有动作）
+_ACTIONS = (None, _act_add, _act_pass, _act_int, _act_declare, _act_assign)
+
+
 def execute_action(prod_num, attrs, symtab):
-    if prod_num == 1:  # E → E + T
-        return attrs[0] + attrs[2]
-    elif prod_num == 2:  # E → T
-        return attrs[0]
-    elif prod_num == 3:  # T → int
-        return int(attrs[0])
-    elif prod_num == 4:  # D → int id
-        var_name = attrs[1]
-        symtab.declare(var_name, "int")
-        return None
-    elif prod_num == 5:  # S → id = E
-        var_name = attrs[0]
-        if not symtab.lookup(var_name):
-            raise Exception(f"变量未定义: {var_name}")
-        # 可扩展：类型检查
-        return None
-    else:
-        raise Exception(f"未知产生式编号: {prod_num}")
+    # 按编号直接取出动作，不随产生式数量逐个比较
+    action = _ACTIONS[prod_num] if 0 < prod_num < len(_ACTIONS) else None
+    if action is None:
+        raise SemanticException(f"未知产生式编号: {prod_num}")
+    return action(attrs, symtab)
     ## end of execute_action
@@ -1,6 +1,6 @@
 from .semantic_actions import execute_action
 from .symbol_table import SymbolTable
-from .semantic_error import SemanticErrorHandler
+from .semantic_error import SemanticErrorHandler, SemanticException
 
 
 class SemanticAnalyzer:
@@ -10,13 +10,14 @@ class SemanticAnalyzer:
         self.errors = SemanticErrorHandler()
 
     def reduce(self, prod_num, rhs_attrs, lineno=None):
+        # rhs_attrs 为 pop_attrs 取出的属性列表（任何可下标访问的序列均可），不再逐次检查类型；
+        # 只捕获语义错误和属性不符合产生式时动作中可能出现的异常
         try:
-            if not isinstance(rhs_attrs, list):
-                raise ValueError("rhs_attrs 必须为列表")
             result = execute_action(prod_num, rhs_attrs, self.symbol_table)
-            self.attr_stack.append(result)
-        except Exception as e:
+        except (SemanticException, LookupError, TypeError, ValueError) as e:
             self.errors.report(str(e), lineno)
+            return
+        self.attr_stack.append(result)
 
     def shift(self, token_attr):
         if token_attr is None:
@@ -28,8 +29,11 @@ class SemanticAnalyzer:
         if count > len(self.attr_stack):
             self.errors.report("pop_attrs 数量超出栈长度")
             return []
+        if count <= 0:
+            return []  # ε产生式不弹出属性（[-0:] 会取到整个栈）
+        # 原地删除栈顶，不再为剩余部分复制一个新列表
         attrs = self.attr_stack[-count:]
-        self.attr_stack = self.attr_stack[:-count]
+        del self.attr_stack[-count:]
         return attrs
 
     def get_result(self):
@@ -1,14 +1,22 @@
 import threading
+from contextlib import nullcontext
+
+
+class SemanticException(Exception):
+    """语义动作中检测到的语义错误（如重复声明、变量未定义）"""
 
 
 class SemanticErrorHandler:
-    def __init__(self, print_enable=True, max_errors=1000):
+    def __init__(self, print_enable=True, max_errors=1000, thread_safe=False):
         self.errors = []
         self.print_enable = print_enable
         self.max_errors = max_errors
-        self._lock = threading.Lock()
+        # 一次分析只在一个线程中进行，默认不加锁；多个线程共用一个处理器时传 thread_safe=True
+        self._lock = threading.Lock() if thread_safe else nullcontext()
 
     def report(self, message, lineno=None):
+        if not self.print_enable and len(self.errors) >= self.max_errors:
+            return  # 错误数已达上限且不打印，不必再格式化消息
         try:
             if not isinstance(message, str):
                 message = str(message)
@@ -1,20 +1,35 @@
+import sys
+
+from .semantic_error import SemanticException
+
+
 class SymbolTable:
     def __init__(self):
         self.scopes = [{}]
+        # 名字 -> 各层作用域中该名字的类型（由外到内），查找只需取最内层，与作用域深度无关；
+        # 每层作用域的字典同时记录了退出时要撤销的名字
+        self._visible = {}
 
     def enter_scope(self):
         self.scopes.append({})
 
     def exit_scope(self):
-        self.scopes.pop()
+        scope = self.scopes.pop()
+        visible = self._visible
+        for name in scope:
+            types = visible[name]
+            types.pop()
+            if not types:
+                del visible[name]
 
     def declare(self, name, type_):
+        # 名字驻留后作为键保存：与词法分析器驻留的标识符是同一对象，查找时只需比较指针
+        name = sys.intern(name)
         if name in self.scopes[-1]:
-            raise Exception(f"重复声明变量: {name}")
+            raise SemanticException(f"重复声明变量: {name}")
         self.scopes[-1][name] = type_
+        self._visible.setdefault(name, []).append(type_)
 
     def lookup(self, name):
-        for scope in reversed(self.scopes):
-            if name in scope:
-                return scope[name]
-        return None
+        types = self._visible.get(name)
+        return types[-1] if types else None
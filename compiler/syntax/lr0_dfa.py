@@ -1,3 +1,4 @@
+import io
 from collections import defaultdict, deque
 import graphviz
 
@@ -28,14 +29,28 @@ class LR0Item:
         return f"{self.lhs} → {' '.join(symbols)}"
 
 class LR0DFA:
-    def __init__(self, productions):
+    def __init__(self, productions, grammar=None):
+        """grammar 为 first_follow.Grammar 对象时直接使用其产生式，不再解析文本"""
         self.augmented_start = None  # 将在_parse_productions中设置
         self.states = []
         self.transitions = dict()
         self.symbols = set()
-        self._parse_productions(productions)
+        if grammar is not None:
+            self._use_grammar(grammar)
+        else:
+            self._parse_productions(productions)
         self._build_dfa()
 
+    def _use_grammar(self, grammar):
+        self.grammar = defaultdict(list)
+        for head, bodies in grammar.productions.items():
+            self.grammar[head] = list(bodies)
+            if head != grammar.start_symbol:
+                self.symbols.add(head)
+                for body in bodies:
+                    self.symbols.update(body)
+        self.augmented_start = grammar.start_symbol
+
     def _parse_productions(self, lines):
         self.grammar = defaultdict(list)
         start = None
@@ -94,9 +109,16 @@ class LR0DFA:
                     self.transitions[(state_map[state], symbol)] = state_map[target]
         self.states = states
 
-    def get_states_str(self):
-        return "\n".join(f"State {i}:\n  " + "\n  ".join(str(item) for item in sorted(s, key=str))
-                         for i, s in enumerate(self.states))
+    def get_states_str(self, limit=None):
+        """limit 为最大字符数，超出时截断并以 "..." 结尾（不会先生成完整文本）"""
+        buf = io.StringIO()
+        for i, s in enumerate(self.states):
+            if i:
+                buf.write("\n")
+            buf.write(f"State {i}:\n  " + "\n  ".join(str(item) for item in sorted(s, key=str)))
+            if limit is not None and buf.tell() > limit:
+                return buf.getvalue()[:limit] + "..."
+        return buf.getvalue()
 
     def get_transitions_str(self):
         return "\n".join(f"State {src} --[{sym}]--> State {tgt}"
@@ -111,7 +133,11 @@ class LR0DFA:
             dot.edge(str(src), str(tgt), label=sym)
         return dot.pipe().decode("utf-8")
 
-def build_lr0_output(text):
-    lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
-    dfa = LR0DFA(lines)
-    return dfa.get_states_str(), dfa.get_transitions_str(), dfa.get_svg()
+def build_lr0_output(text, limit=None, grammar=None):
+    """grammar 为已由 process_first_follow 解析的文法对象时复用它，不再重新解析 text"""
+    if grammar is not None:
+        dfa = LR0DFA(None, grammar)
+    else:
+        lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
+        dfa = LR0DFA(lines)
+    return dfa.get_states_str(limit), dfa.get_transitions_str(), dfa.get_svg()
@@ -32,7 +32,8 @@ class LR1Item:
         return f"{self.lhs} → {' '.join(symbols)}, {self.lookahead}"
 
 class LR1DFA:
-    def __init__(self, productions):
+    def __init__(self, productions, grammar=None):
+        """grammar 为 first_follow.Grammar 对象时直接使用其产生式，不再解析文本"""
         self.augmented_start = "S'"
         self.states = []
         self.transitions = dict()
@@ -40,7 +41,10 @@ class LR1DFA:
         self.grammar = defaultdict(list)
         self.first = defaultdict(set)
         self.productions = []
-        self._parse_productions(productions)
+        if grammar is not None:
+            self._use_grammar(grammar)
+        else:
+            self._parse_productions(productions)
         self._build_first()
         self._build_dfa()
 
@@ -61,6 +65,21 @@ class LR1DFA:
         self.grammar[self.augmented_start] = [[start]]
         self.productions.insert(0, (self.augmented_start, [start]))
 
+    def _use_grammar(self, grammar):
+        # 产生式编号与 build_slr1_table 一致：拓广产生式为0号，其余按非终结符分组
+        self.augmented_start = grammar.start_symbol
+        for head, bodies in grammar.productions.items():
+            if head == self.augmented_start:
+                continue
+            for body in bodies:
+                self.grammar[head].append(body)
+                self.productions.append((head, body))
+                self.symbols.update(body)
+            self.symbols.add(head)
+        start_body = grammar.productions[self.augmented_start][0]
+        self.grammar[self.augmented_start] = [start_body]
+        self.productions.insert(0, (self.augmented_start, start_body))
+
     def _build_first(self):
         # 简单计算FIRST集（不考虑ε复杂情况）
         for sym in self.symbols:
@@ -68,6 +87,8 @@ class LR1DFA:
                 self.first[sym] = {sym}
             else:
                 self.first[sym] = set()
+        # 结束符作为向前看符号出现在闭包计算中
+        self.first['$'] = {'$'}
         changed = True
         while changed:
             changed = False
@@ -174,23 +195,96 @@ class LR1DFA:
                             action[i][item.lookahead] = f"r{prod_num}"
         return action, goto
 
-    def visualize_dfa(self):
+    def visualize_dfa(self, state_map=None):
+        """state_map 为原状态到合并后状态的映射（见 minimize_lr_tables），为空时按原状态绘制"""
         dot = graphviz.Digraph(format="svg")
-        for i, state in enumerate(self.states):
-            label = f"State {i}\\n" + "\\n".join(str(item) for item in sorted(state, key=str))
-            dot.node(str(i), label=label, shape="box", fontname="Courier")
-        for (src, sym), tgt in self.transitions.items():
+        if state_map is None:
+            for i, state in enumerate(self.states):
+                label = f"State {i}\\n" + "\\n".join(str(item) for item in sorted(state, key=str))
+                dot.node(str(i), label=label, shape="box", fontname="Courier")
+            for (src, sym), tgt in self.transitions.items():
+                dot.edge(str(src), str(tgt), label=sym)
+            return dot.pipe().decode("utf-8")
+
+        merged = defaultdict(list)
+        for old_id, new_id in enumerate(state_map):
+            merged[new_id].append(old_id)
+        for new_id in sorted(merged):
+            old_ids = merged[new_id]
+            header = f"State {new_id}"
+            if len(old_ids) > 1:
+                header += f" (合并 {', '.join(map(str, old_ids))})"
+            items = set().union(*(self.states[i] for i in old_ids))
+            label = header + "\\n" + "\\n".join(sorted(map(str, items)))
+            dot.node(str(new_id), label=label, shape="box", fontname="Courier")
+        edges = {(state_map[src], sym, state_map[tgt]) for (src, sym), tgt in self.transitions.items()}
+        for src, sym, tgt in sorted(edges):
             dot.edge(str(src), str(tgt), label=sym)
         return dot.pipe().decode("utf-8")
 
+
+def minimize_lr_tables(action, goto, num_states):
+    """
+    合并行为等价的LR状态（分划求精），返回新的 action 表、goto 表以及原状态到新状态的映射。
+    两个状态等价当且仅当归约/接受动作相同，且移进和转移目标落在同一等价类中。
+    """
+    def local_signature(i):
+        row = action.get(i, {})
+        return (
+            tuple(sorted((sym, 's' if act[0] == 's' else act) for sym, act in row.items())),
+            tuple(sorted(goto.get(i, {})))
+        )
+
+    # 初始划分：按状态自身的动作划分，之后按转移目标所在的类不断细分
+    signatures = {}
+    classes = [signatures.setdefault(local_signature(i), len(signatures)) for i in range(num_states)]
+    while True:
+        signatures = {}
+        refined = []
+        for i in range(num_states):
+            shifts = tuple(sorted(
+                (sym, classes[int(act[1:])]) for sym, act in action.get(i, {}).items() if act[0] == 's'
+            ))
+            gotos = tuple(sorted((sym, classes[tgt]) for sym, tgt in goto.get(i, {}).items()))
+            refined.append(signatures.setdefault((classes[i], shifts, gotos), len(signatures)))
+        if len(signatures) == len(set(classes)):
+            break
+        classes = refined
+
+    # 按首次出现的顺序重新编号，保证初始状态仍为0
+    renumber = {}
+    state_map = [renumber.setdefault(c, len(renumber)) for c in refined]
+
+    new_action = defaultdict(dict)
+    new_goto = defaultdict(dict)
+    for i in range(num_states):
+        new_id = state_map[i]
+        if i in action:
+            new_action[new_id] = {
+                sym: f"s{state_map[int(act[1:])]}" if act[0] == 's' else act
+                for sym, act in action[i].items()
+            }
+        if i in goto:
+            new_goto[new_id] = {sym: state_map[tgt] for sym, tgt in goto[i].items()}
+    return new_action, new_goto, state_map
+
 # 封装成方便调用的接口函数，方便在app.py里调用
-def build_lr1_output(text):
+def build_lr1_output(text, minimize=False, grammar=None):
     """
     输入文法文本（多行字符串），
     返回 action 表（dict），goto 表（dict），以及SVG字符串
+    minimize 为真时先合并等价状态，SVG 也按合并后的状态绘制
+    grammar 为已由 process_first_follow 解析的文法对象时复用它，不再重新解析 text
     """
-    lines = [line.strip() for line in text.strip().split('\n') if line.strip()]
-    lr1dfa = LR1DFA(lines)
+    if grammar is not None:
+        lr1dfa = LR1DFA(None, grammar)
+    else:
+        lines = [line.strip() for line in text.strip().split('\n') if line.strip()]
+        lr1dfa = LR1DFA(lines)
     action, goto = lr1dfa.build_action_goto()
-    svg = lr1dfa.visualize_dfa()
+    if minimize:
+        action, goto, state_map = minimize_lr_tables(action, goto, len(lr1dfa.states))
+        svg = lr1dfa.visualize_dfa(state_map)
+    else:
+        svg = lr1dfa.visualize_dfa()
     return action, goto, svg
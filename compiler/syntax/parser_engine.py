@@ -7,8 +7,11 @@ from .ast_builder import ASTBuilder, ParseTreeToAST
 from .ast_nodes import ASTVisualizer
 
 def parse_sentence(grammar_text, sentence, method="SLR(1)", build_ast=True):
-
-    tokens = sentence.strip().split() + ['$']
+    # sentence 可以是以空格分隔的字符串，也可以是已切分好的文法符号序列
+    if isinstance(sentence, str):
+        tokens = sentence.split() + ['$']
+    else:
+        tokens = list(sentence) + ['$']
     lines = [line.strip() for line in grammar_text.strip().split('\n') if line.strip()]
 
     # 获取产生式编号列表（用于规约动作显示）
@@ -34,7 +37,7 @@ def parse_sentence(grammar_text, sentence, method="SLR(1)", build_ast=True):
         grammar.transitions = dfa.transitions
         action_table, goto_table = build_slr1_table(grammar)
     else:
-        action_table, goto_table, _ = build_lr1_output(grammar_text)
+        action_table, goto_table, _ = build_lr1_output(grammar_text, minimize=True)
 
     # 初始化分析栈
     stack = [0]
@@ -42,6 +45,8 @@ def parse_sentence(grammar_text, sentence, method="SLR(1)", build_ast=True):
     steps = []
     ip = 0
     step = 1
+    # 剩余输入串只在移入后变化，归约步骤复用上一次拼接的结果
+    remaining = " ".join(tokens)
 
     while True:
         state = stack[-1]
@@ -53,7 +58,7 @@ def parse_sentence(grammar_text, sentence, method="SLR(1)", build_ast=True):
             'step': step,
             'stack': str(stack),
             'symbols': " ".join(symbols),
-            'input': " ".join(tokens[ip:]),
+            'input': remaining,
             'action': act if act else "error"
         }
         
@@ -75,6 +80,7 @@ def parse_sentence(grammar_text, sentence, method="SLR(1)", build_ast=True):
                 step_info['ast_action'] = f'push_terminal({token})'
             
             ip += 1
+            remaining = remaining[len(token) + 1:]
             step_info['action'] = f'shift {act[1:]}'
             
         elif act.startswith('r'):
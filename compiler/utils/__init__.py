@@ -10,14 +10,6 @@
 - 调试工具
 """
 
-from .visualization import (
-    visualize_nfa,
-    visualize_dfa,
-    render_transition_table,
-    create_token_table_html,
-    create_statistics_chart
-)
-
 from .file_utils import (
     read_file_safe,
     write_file_safe,
@@ -59,4 +51,21 @@ __all__ = [
     'format_statistics',
     'format_rules_table',
     'create_html_report'
-]
\ No newline at end of file
+]
+
+# 可视化工具依赖graphviz、pandas等较重的第三方库，首次访问时再导入
+_VISUALIZATION_EXPORTS = {
+    'visualize_nfa',
+    'visualize_dfa',
+    'render_transition_table',
+    'create_token_table_html',
+    'create_statistics_chart'
+}
+
+
+def __getattr__(name):
+    """按需导入可视化工具 (PEP 562)"""
+    if name in _VISUALIZATION_EXPORTS:
+        from . import visualization
+        return getattr(visualization, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
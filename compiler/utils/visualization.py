@@ -26,10 +26,10 @@ def visualize_nfa(nfa: NFA, title: str = "NFA", format: str = 'png') -> Image.Im
     Args:
         nfa: 要可视化的NFA
         title: 图表标题
-        format: 输出格式 ('png', 'svg', 'pdf')
+        format: 输出格式 ('png', 'svg', 'dot')
     
     Returns:
-        PIL Image对象
+        PIL Image对象，或SVG/DOT字符串
     """
     dot = graphviz.Digraph(comment=title)
     dot.attr(rankdir='LR')
@@ -69,8 +69,10 @@ def visualize_nfa(nfa: NFA, title: str = "NFA", format: str = 'png') -> Image.Im
         dot.node('start', '', shape='point')
         dot.edge('start', str(nfa.start_state.id))
     
-    # 渲染为图片
-    if format.lower() == 'svg':
+    # 渲染为图片（'dot' 只返回DOT源码，不启动dot进程）
+    if format.lower() == 'dot':
+        return dot.source
+    elif format.lower() == 'svg':
         svg_data = dot.pipe(format='svg')
         return svg_data.decode('utf-8')
     else:
@@ -85,10 +87,10 @@ def visualize_dfa(dfa: DFA, title: str = "DFA", format: str = 'png') -> Image.Im
     Args:
         dfa: 要可视化的DFA
         title: 图表标题
-        format: 输出格式
+        format: 输出格式 ('png', 'svg', 'dot')
     
     Returns:
-        PIL Image对象或SVG字符串
+        PIL Image对象，或SVG/DOT字符串
     """
     dot = graphviz.Digraph(comment=title)
     dot.attr(rankdir='LR')
@@ -125,8 +127,10 @@ def visualize_dfa(dfa: DFA, title: str = "DFA", format: str = 'png') -> Image.Im
         dot.node('start', '', shape='point')
         dot.edge('start', dfa.start_state)
     
-    # 渲染为图片
-    if format.lower() == 'svg':
+    # 渲染为图片（'dot' 只返回DOT源码，不启动dot进程）
+    if format.lower() == 'dot':
+        return dot.source
+    elif format.lower() == 'svg':
         svg_data = dot.pipe(format='svg')
         return svg_data.decode('utf-8')
     else:
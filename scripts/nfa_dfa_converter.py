@@ -12,6 +12,10 @@ from PIL import Image
 from typing import List, Dict, Set, Tuple, Optional
 from lexical_analyzer import State, NFA, DFA, TokenType
 
+# 操作符优先级（模块级常量，不在每次转换时重新创建）
+_PRECEDENCE = {'|': 1, '.': 2, '*': 3, '+': 3, '?': 3}
+_OPERATORS = frozenset('|.*+?()')
+
 class RegexToNFA:
     """正则表达式到NFA转换器"""
     
@@ -20,10 +24,6 @@ class RegexToNFA:
     
     def convert(self, regex: str, token_type: TokenType = None) -> NFA:
         """将正则表达式转换为NFA"""
-        # 定义操作符优先级
-        precedence = {'|': 1, '.': 2, '*': 3, '+': 3, '?': 3}
-        operators = {'|', '.', '*', '+', '?', '(', ')'}
-        
         def add_concat_operator(regex):
             """在需要的位置添加连接操作符('.')"""
             output = []
@@ -37,9 +37,10 @@ class RegexToNFA:
             """使用调度场算法将中缀表达式转换为后缀表达式"""
             output = []
             operator_stack = []
+            prec = _PRECEDENCE.get
             
             for token in regex:
-                if token not in operators:  # 普通字符
+                if token not in _OPERATORS:  # 普通字符
                     output.append(token)
                 elif token == '(':  # 左括号
                     operator_stack.append(token)
@@ -48,8 +49,9 @@ class RegexToNFA:
                         output.append(operator_stack.pop())
                     operator_stack.pop()  # 弹出左括号
                 else:  # 其他操作符
+                    token_prec = prec(token, 0)
                     while (operator_stack and operator_stack[-1] != '(' and 
-                           precedence.get(operator_stack[-1], 0) >= precedence.get(token, 0)):
+                           prec(operator_stack[-1], 0) >= token_prec):
                         output.append(operator_stack.pop())
                     operator_stack.append(token)
             
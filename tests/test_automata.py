@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import random
+
+import pytest
+
+from compiler.lexical.analyzer import LexicalAnalyzer
+from compiler.lexical.automata import DFAMinimizer, LazyDFA, NFAToDFA, RegexToNFA
+from compiler.lexical.token import TokenType
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RULE_FILES = [
+    os.path.join(ROOT, 'compiler', 'lexical', 'c_rules.txt'),
+    os.path.join(ROOT, 'examples', 'lexical_rules.txt'),
+]
+SAMPLE_FILES = [
+    os.path.join(ROOT, 'examples', 'sample_code.c'),
+    os.path.join(ROOT, 'examples', 'sample_code.pas'),
+]
+
+
+def _token_specs(rules_file):
+    """规则文件中 RegexToNFA 支持的规则（不支持 (?:...) 等写法的规则跳过），按优先级排列"""
+    analyzer = LexicalAnalyzer()
+    assert analyzer.load_rules_from_file(rules_file)
+    specs = []
+    for rule in analyzer.rules:
+        try:
+            RegexToNFA().convert(rule.pattern, rule.token_type)
+        except ValueError:
+            continue
+        specs.append((rule.pattern, rule.token_type))
+    return specs
+
+
+def _nfa_longest_match(nfa, text, position):
+    """参照实现：直接在NFA上做子集模拟，接受状态取编号最小者"""
+    def accepted(states):
+        accepting = [state for state in states if state.is_accept]
+        return min(accepting, key=lambda state: state.id).token_type if accepting else None
+
+    states = nfa.epsilon_closure({nfa.start_state})
+    last = (position, accepted(states)) if any(state.is_accept for state in states) else None
+    for index in range(position, len(text)):
+        states = nfa.epsilon_closure(nfa.move(states, text[index]))
+        if not states:
+            break
+        if any(state.is_accept for state in states):
+            last = (index + 1, accepted(states))
+    return last
+
+
+def _sample_texts(alphabet):
+    texts = []
+    for filename in SAMPLE_FILES:
+        with open(filename, 'r', encoding='utf-8') as f:
+            texts.append(f.read())
+    rng = random.Random(0)
+    texts.extend(''.join(rng.choice(alphabet) for _ in range(200)) for _ in range(20))
+    return texts
+
+
+@pytest.mark.parametrize('rules_file', RULE_FILES)
+def test_dfa_variants_accept_same_language(rules_file):
+    nfa = RegexToNFA().union_all(_token_specs(rules_file))
+    dfa = NFAToDFA().convert(nfa)
+    minimized = DFAMinimizer().minimize(dfa)
+    lazy = LazyDFA(nfa)
+    # 缓存上限很小时会反复清空重建，结果仍须一致
+    small_lazy = LazyDFA(nfa, cache_limit=4)
+
+    assert len(minimized.states) <= len(dfa.states)
+
+    alphabet = sorted(nfa.alphabet - {'ε'}) + ['\x00', '变']
+    for text in _sample_texts(alphabet):
+        for position in range(len(text)):
+            expected = _nfa_longest_match(nfa, text, position)
+            assert dfa.longest_match(text, position) == expected
+            assert minimized.longest_match(text, position) == expected
+            assert lazy.longest_match(text, position) == expected
+            assert small_lazy.longest_match(text, position) == expected
+
+            if expected is not None:
+                word = text[position:expected[0]]
+                assert dfa.simulate(word) == (True, expected[1])
+                assert minimized.simulate(word) == (True, expected[1])
+                assert lazy.simulate(word) == (True, expected[1])
+                assert small_lazy.simulate(word) == (True, expected[1])
+
+    assert small_lazy.cache_clears > 0
+
+
+def test_union_all_prefers_earlier_rule():
+    nfa = RegexToNFA().union_all([
+        ('if', TokenType.IF),
+        ('[a-z]+', TokenType.IDENTIFIER),
+    ])
+    dfa = NFAToDFA().convert(nfa)
+    # 同样长度的匹配以先给出的规则为准，更长的匹配优先
+    assert dfa.longest_match('if') == (2, TokenType.IF)
+    assert dfa.longest_match('iffy') == (4, TokenType.IDENTIFIER)
+    assert dfa.longest_match('x if', 2) == (4, TokenType.IF)
+    assert dfa.longest_match('1') is None
+
+
+def test_dot_is_literal():
+    nfa = RegexToNFA().convert(r'a.b')
+    dfa = NFAToDFA().convert(nfa)
+    assert dfa.simulate('a.b')[0]
+    assert not dfa.simulate('axb')[0]
+    assert LazyDFA(nfa).simulate('a.b')[0]
+    assert not LazyDFA(nfa).simulate('axb')[0]
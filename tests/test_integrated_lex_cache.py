@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from compiler.integrated_analyzer import IntegratedAnalyzer
+
+
+def _fields(tokens):
+    return [(token.type, token.value, token.line, token.column) for token in tokens]
+
+
+def test_cached_lex_result_is_not_shared():
+    analyzer = IntegratedAnalyzer('c')
+    first = analyzer.analyze_code('int a;\nint b;')
+    expected = _fields(first.tokens)
+    # 修改上一次结果中的Token和列表，不会影响同一源代码的下一次分析
+    first.tokens[0].value = 'changed'
+    first.tokens.clear()
+    first.lexical_errors.append('changed')
+
+    second = analyzer.analyze_code('int a;\nint b;')
+    assert _fields(second.tokens) == expected
+    assert second.lexical_errors == []
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+
+import pytest
+
+from compiler.lexical.analyzer import (
+    LexicalAnalyzer, LexicalRule, _build_dispatch, _first_chars, _iter_rule_matches
+)
+from compiler.lexical.token import TokenType
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RULE_FILES = [
+    os.path.join(ROOT, 'compiler', 'lexical', 'c_rules.txt'),
+    os.path.join(ROOT, 'examples', 'lexical_rules.txt'),
+]
+SAMPLE_FILES = [
+    os.path.join(ROOT, 'examples', 'sample_code.c'),
+    os.path.join(ROOT, 'examples', 'sample_code.pas'),
+]
+
+
+def _sample_texts():
+    texts = []
+    for filename in SAMPLE_FILES:
+        with open(filename, 'r', encoding='utf-8') as f:
+            texts.append(f.read())
+    # 覆盖全部ASCII字符（包括 \x1c-\x1f 这类 \s 也能匹配的控制字符）和非ASCII字符
+    texts.append(''.join(chr(code) for code in range(128)) + ' 变量α = 1;\x1c\x1fx')
+    return texts
+
+
+def _plain_scan(rules, text):
+    """参照实现：所有规则按优先级直接拼成一个正则，逐个位置扫描"""
+    master = re.compile('|'.join(f'(?P<g{i}>{rule.pattern})' for i, rule in enumerate(rules)))
+    result = []
+    position = 0
+    while position < len(text):
+        match = master.match(text, position)
+        if match and match.end() > position:
+            result.append((match.start(), match.end(), rules[int(match.lastgroup[1:])].token_type))
+            position = match.end()
+        else:
+            position += 1
+    return result
+
+
+def _dispatch_scan(rules, text):
+    return [(match.start(), match.end(), token_type)
+            for match, token_type in _iter_rule_matches(*_build_dispatch(rules), text)]
+
+
+@pytest.mark.parametrize('rules_file', RULE_FILES)
+def test_dispatch_matches_plain_scan(rules_file):
+    analyzer = LexicalAnalyzer()
+    assert analyzer.load_rules_from_file(rules_file)
+    for text in _sample_texts():
+        assert _dispatch_scan(analyzer.rules, text) == _plain_scan(analyzer.rules, text)
+
+
+def test_dispatch_with_optional_leading_atom():
+    # 开头元素可以出现零次时，规则可能从其他字符开始匹配，不能只登记在开头字符下
+    rules = [
+        LexicalRule(r'x{0,2}y', TokenType.IDENTIFIER),
+        LexicalRule(r'x{,2}z', TokenType.NUMBER),
+        LexicalRule(r'\s+', TokenType.WHITESPACE),
+    ]
+    text = 'y xz z xxy\x1c\x1fy'
+    assert _dispatch_scan(rules, text) == _plain_scan(rules, text)
+
+
+def test_first_chars_is_conservative():
+    assert _first_chars(r'a{0,3}b') is None
+    assert _first_chars(r'a{,3}b') is None
+    assert _first_chars(r'a{0}b') is None
+    assert _first_chars(r'a*b') is None
+    assert _first_chars(r'a?b') is None
+    assert _first_chars(r'a{2,}b') == (frozenset('a'), False)
+    assert _first_chars(r'a+b') == (frozenset('a'), False)
+    # \s 的字符集与 re 一致
+    assert _first_chars(r'\s')[0] == frozenset(chr(code) for code in range(128) if re.match(r'\s', chr(code)))
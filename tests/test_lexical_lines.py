@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from compiler.lexical.analyzer import create_c_analyzer, create_pascal_analyzer
+from compiler.lexical.token import TokenType
+
+
+def _positions(tokens):
+    """非换行Token的 (值, 行号, 列号)"""
+    return [(token.value, token.line, token.column) for token in tokens
+            if token.type not in (TokenType.NEWLINE, TokenType.EOF)]
+
+
+def test_c_lines_after_multiline_comment_and_string():
+    analyzer = create_c_analyzer()
+    tokens = analyzer.analyze('/* x\ny\nz */ int b;\nchar *s = "a\nb";\nint c;')
+
+    assert _positions(tokens) == [
+        ('int', 3, 6), ('b', 3, 10), (';', 3, 11),
+        ('char', 4, 1), ('*', 4, 6), ('s', 4, 7), ('=', 4, 9), ('"a\nb"', 4, 11),
+        (';', 5, 3),
+        ('int', 6, 1), ('c', 6, 5), (';', 6, 6),
+    ]
+    assert tokens[-1].type == TokenType.EOF
+    assert (tokens[-1].line, tokens[-1].column) == (6, 7)
+
+
+def test_c_lines_after_comment_ending_mid_line():
+    analyzer = create_c_analyzer()
+    tokens = analyzer.analyze('// x\n/* a\n\n*/int b; /* c */ int d;')
+
+    assert _positions(tokens) == [
+        ('int', 4, 3), ('b', 4, 7), (';', 4, 8),
+        ('int', 4, 18), ('d', 4, 22), (';', 4, 23),
+    ]
+
+
+def test_pascal_lines_after_multiline_comment_and_string():
+    analyzer = create_pascal_analyzer()
+    tokens = analyzer.analyze("{ x\ny }\nvar b: integer;\ns := 'a\nb';\nc := 1;")
+
+    assert not analyzer.errors
+    assert _positions(tokens) == [
+        ('var', 3, 1), ('b', 3, 5), (':', 3, 6), ('integer', 3, 8), (';', 3, 15),
+        ('s', 4, 1), (':=', 4, 3), ("'a\nb'", 4, 6),
+        (';', 5, 3),
+        ('c', 6, 1), (':=', 6, 3), ('1', 6, 6), (';', 6, 7),
+    ]
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import itertools
+
+import pytest
+
+from compiler.syntax.lr1_dfa import LR1DFA, minimize_lr_tables
+
+EXPR_GRAMMAR = [
+    "E → E + T | T",
+    "T → T * F | F",
+    "F → ( E ) | id",
+]
+CC_GRAMMAR = [
+    "S → C C",
+    "C → c C | d",
+]
+
+
+def _accepts(action, goto, productions, sentence):
+    """用 action/goto 表驱动LR分析，返回句子是否被接受"""
+    tokens = sentence.split() + ['$']
+    stack = [0]
+    ip = 0
+    while True:
+        act = action.get(stack[-1], {}).get(tokens[ip])
+        if act is None:
+            return False
+        if act == 'acc':
+            return True
+        if act[0] == 's':
+            stack.append(int(act[1:]))
+            ip += 1
+        else:
+            head, body = productions[int(act[1:])]
+            if body:
+                del stack[-len(body):]
+            target = goto.get(stack[-1], {}).get(head)
+            if target is None:
+                return False
+            stack.append(target)
+
+
+def _sentences(terminals, max_length):
+    for length in range(max_length + 1):
+        for symbols in itertools.product(terminals, repeat=length):
+            yield ' '.join(symbols)
+
+
+def test_first_of_endmarker():
+    # 向前看符号 $ 参与闭包计算，FIRST($) 必须为 {$}，否则以 $ 为向前看的项目会丢失
+    dfa = LR1DFA(EXPR_GRAMMAR)
+    assert dfa.first['$'] == {'$'}
+    action, goto = dfa.build_action_goto()
+    assert any(act == 'acc' for row in action.values() for act in row.values())
+    assert _accepts(action, goto, dfa.productions, 'id + id * id')
+    assert _accepts(action, goto, dfa.productions, '( id + id ) * id')
+    assert not _accepts(action, goto, dfa.productions, 'id + * id')
+
+
+@pytest.mark.parametrize('grammar, terminals, max_length', [
+    (EXPR_GRAMMAR, ['id', '+', '*', '(', ')'], 5),
+    (CC_GRAMMAR, ['c', 'd'], 6),
+])
+def test_minimized_tables_accept_same_language(grammar, terminals, max_length):
+    dfa = LR1DFA(grammar)
+    action, goto = dfa.build_action_goto()
+    num_states = len(dfa.states)
+    new_action, new_goto, state_map = minimize_lr_tables(action, goto, num_states)
+
+    assert len(state_map) == num_states
+    assert state_map[0] == 0
+    assert len(set(state_map)) <= num_states
+    for sentence in _sentences(terminals, max_length):
+        assert (_accepts(new_action, new_goto, dfa.productions, sentence)
+                == _accepts(action, goto, dfa.productions, sentence)), sentence
+
+
+def test_minimize_merges_equivalent_states():
+    # 状态1、2的动作相同，合并为一个；状态3、4自身动作相同，但移进目标分属不同的类，不能合并
+    action = {
+        0: {'a': 's1', 'b': 's2', 'c': 's3', 'd': 's4'},
+        1: {'$': 'r1'},
+        2: {'$': 'r1'},
+        3: {'x': 's5'},
+        4: {'x': 's6'},
+        5: {'$': 'r2'},
+        6: {'$': 'r3'},
+    }
+    goto = {0: {'A': 1}}
+    new_action, new_goto, state_map = minimize_lr_tables(action, goto, 7)
+
+    assert state_map[0] == 0
+    assert state_map[1] == state_map[2]
+    assert state_map[3] != state_map[4]
+    assert state_map[5] != state_map[6]
+    assert len(set(state_map)) == 6
+    assert new_action[0]['a'] == new_action[0]['b'] == f"s{state_map[1]}"
+    assert new_goto[0] == {'A': state_map[1]}
+    assert new_action[state_map[3]] == {'x': f"s{state_map[5]}"}
+    assert new_action[state_map[4]] == {'x': f"s{state_map[6]}"}
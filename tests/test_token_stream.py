@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+
+from compiler.lexical.analyzer import analyze_file, create_c_analyzer, create_pascal_analyzer
+from compiler.lexical.token import Token, TokenStream, TokenType
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _fields(tokens):
+    return [(token.type, token.value, token.line, token.column) for token in tokens]
+
+
+def test_from_tuples():
+    infos = [
+        (TokenType.IDENTIFIER, 'x', 1, 1),
+        (TokenType.ASSIGN, '=', 1, 3),
+        (TokenType.NUMBER, '42', 2, 5),
+    ]
+    stream = TokenStream.from_tuples(iter(infos))
+
+    assert len(stream) == 3
+    assert list(stream.lines) == [1, 1, 2]
+    assert list(stream.columns) == [1, 3, 5]
+    assert isinstance(stream[1], Token)
+    assert _fields([stream[-1]]) == [infos[-1]]
+    assert _fields(stream) == infos
+    assert _fields(stream.to_tokens()) == infos
+
+
+def test_from_tuples_empty():
+    stream = TokenStream.from_tuples(iter(()))
+    assert len(stream) == 0
+    assert stream.to_tokens() == []
+
+
+def test_analyze_stream_matches_analyze():
+    for create, filename in ((create_c_analyzer, 'sample_code.c'),
+                             (create_pascal_analyzer, 'sample_code.pas')):
+        with open(os.path.join(ROOT, 'examples', filename), 'r', encoding='utf-8') as f:
+            source = f.read()
+        analyzer = create()
+        tokens = analyzer.analyze(source)
+        table = analyzer.get_tokens_table()
+        statistics = analyzer.get_token_statistics()
+
+        stream = analyzer.analyze_stream(source)
+        assert analyzer.tokens is stream
+        assert _fields(stream) == _fields(tokens)
+        assert analyzer.get_tokens_table() == table
+        assert analyzer.get_token_statistics() == statistics
+
+
+def test_analyze_file_returns_fresh_tokens():
+    filename = os.path.join(ROOT, 'examples', 'sample_code.c')
+    tokens, errors = analyze_file(filename, 'c')
+    expected = _fields(tokens)
+    # 修改上一次返回的Token不会影响缓存的结果
+    tokens[0].value = 'changed'
+    tokens[0].line = 0
+    tokens.clear()
+
+    again, again_errors = analyze_file(filename, 'c')
+    assert _fields(again) == expected
+    assert again_errors == errors